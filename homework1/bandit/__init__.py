@@ -1,4 +1,7 @@
 from bandit.bandit import Bandit
+from bandit.batch import BatchBanditEnvironment, BatchLaw
 from bandit.env import BanditEnvironment
 from bandit.info import Info
 from bandit.policy import *
+from bandit.recorder import *
+from bandit.sweep import *
@@ -20,11 +20,13 @@ class Bandit:
     def span(self, value: float):
         self.__span = value
 
-    def __init__(self, mean: float, span: float) -> None:
+    def __init__(self, mean: float, span: float, id: int | None = None) -> None:
         self.mean = mean
         self.span = span
-        self.id = Bandit.id
-        Bandit.id += 1
+        if id is None:
+            id = Bandit.id
+            Bandit.id += 1
+        self.id = id
 
     def __hash__(self) -> int:
         return hash(self.id)
@@ -0,0 +1,137 @@
+from copy import deepcopy
+from typing import Callable
+
+import numpy as np
+
+from bandit.bandit import Bandit
+from bandit.policy import Policy
+
+# A law for batches: draws the (runs, arms) means and spans of all testbeds in
+# one vectorized call on the given generator.
+BatchLaw = Callable[
+    [np.random.Generator, tuple[int, int]], tuple[np.ndarray, np.ndarray]
+]
+
+
+class BatchBanditEnvironment:
+    """
+    Runs many independent bandit testbeds in lockstep. Every testbed holds the
+    same number of arms; means, spans and Q estimates are kept in
+    (runs, arms) arrays so a single step is one vectorized draw for all runs.
+    """
+
+    @property
+    def means(self) -> np.ndarray:
+        return self.__means
+
+    @property
+    def spans(self) -> np.ndarray:
+        return self.__spans
+
+    @property
+    def q(self) -> np.ndarray:
+        return self.__q
+
+    def __init__(
+        self,
+        means: np.ndarray,
+        spans: np.ndarray,
+        is_stationary: bool = True,
+        seed: int | np.random.SeedSequence | np.random.Generator | None = None,
+    ) -> None:
+        self.__means: np.ndarray = np.array(means, dtype=np.float64, ndmin=2)
+        self.__spans: np.ndarray = np.array(spans, dtype=np.float64, ndmin=2)
+        if self.__means.shape != self.__spans.shape:
+            raise ValueError("Means and spans must have the same shape!")
+
+        self.__is_stationary: bool = is_stationary
+        self.__rng: np.random.Generator = np.random.default_rng(seed)
+        self.__q: np.ndarray = np.zeros_like(self.__means)
+
+    @classmethod
+    def from_law(
+        cls,
+        runs: int,
+        arms: int,
+        law: BatchLaw,
+        is_stationary: bool = True,
+        seed: int | np.random.SeedSequence | np.random.Generator | None = None,
+    ) -> "BatchBanditEnvironment":
+        rng = np.random.default_rng(seed)
+        means, spans = BatchBanditEnvironment.__draw(law, rng, (runs, arms))
+        return cls(means, spans, is_stationary, rng)
+
+    @classmethod
+    def from_bandits(
+        cls,
+        bandits: list[Bandit],
+        runs: int = 1,
+        is_stationary: bool = True,
+        seed: int | np.random.SeedSequence | None = None,
+    ) -> "BatchBanditEnvironment":
+        means = np.tile([bandit.mean for bandit in bandits], (runs, 1))
+        spans = np.tile([bandit.span for bandit in bandits], (runs, 1))
+        return cls(means, spans, is_stationary, seed)
+
+    @staticmethod
+    def __draw(
+        law: BatchLaw, rng: np.random.Generator, shape: tuple[int, int]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        means, spans = law(rng, shape)
+        return (
+            np.broadcast_to(np.asarray(means, dtype=np.float64), shape).copy(),
+            np.broadcast_to(np.asarray(spans, dtype=np.float64), shape).copy(),
+        )
+
+    def change_environment(self, change_law: BatchLaw) -> None:
+        if self.__is_stationary:
+            return
+
+        self.__means, self.__spans = BatchBanditEnvironment.__draw(
+            change_law, self.__rng, self.__means.shape
+        )
+
+    def pull_leavers(self, arms: np.ndarray) -> np.ndarray:
+        rows = np.arange(self.__means.shape[0])
+        noise = self.__rng.random(self.__means.shape[0]) - 0.5
+        return self.__means[rows, arms] + 2 * self.__spans[rows, arms] * noise
+
+    def run(
+        self,
+        policy: Policy,
+        iterations: int = 10000,
+        changes_at: list[int] | None = None,
+        change_law: BatchLaw | None = None,
+        alpha: float = 0.1,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Plays every testbed for the given number of iterations and returns the
+        reward and the share of optimal actions at each step, averaged over
+        all runs.
+        """
+        if self.__is_stationary or not change_law:
+            changes_at: list[int] = [-1]
+
+        changes_at: list[int] = deepcopy(changes_at)
+        change_at = changes_at.pop(0)
+
+        rows = np.arange(self.__means.shape[0])
+        average_rewards = np.empty(iterations, dtype=np.float64)
+        optimal_actions = np.empty(iterations, dtype=np.float64)
+        optimal = np.argmax(self.__means, axis=1)
+
+        for game in range(iterations):
+            if game == change_at:
+                self.change_environment(change_law)
+                optimal = np.argmax(self.__means, axis=1)
+                change_at = changes_at.pop(0) if changes_at else -1
+
+            arms = policy.act_batch(self.__q, self.__rng)
+            rewards = self.pull_leavers(arms)
+            policy.update_batch(arms, rewards)
+
+            self.__q[rows, arms] += alpha * (rewards - self.__q[rows, arms])
+            average_rewards[game] = rewards.mean()
+            optimal_actions[game] = np.mean(arms == optimal)
+
+        return average_rewards, optimal_actions
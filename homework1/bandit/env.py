@@ -3,6 +3,7 @@ from typing import Callable
 
 from bandit.bandit import Bandit
 from bandit.policy import Policy
+from bandit.recorder import MemoryRecorder, Recorder
 from bandit.utils import Q
 
 
@@ -34,23 +35,30 @@ class BanditEnvironment:
         changes_at: list[int] | None = None,
         change_law: Callable[..., tuple[float, float]] | None = None,
         alpha: float = 0.1,
-    ) -> tuple[dict[Bandit, dict[int, float]], dict[Bandit, list[float]], list[float]]:
+        recorder: Recorder | None = None,
+    ) -> tuple[Recorder, dict[Bandit, list[float]]]:
+        """
+        Plays `iterations` games and returns the recorder and the evolution of
+        every arm's mean. The recorder replaces the q_evol dictionary and the
+        reward list that run returned before: read them back with
+        recorder.q_evol(bandit) and recorder.rewards(). Without a recorder, a
+        MemoryRecorder keeps the whole run, as run used to.
+        """
+        if recorder is None:
+            recorder = MemoryRecorder()
+
         if self.__is_stationary or not change_law:
             changes_at: list[int] = [-1]
 
         changes_at: list[int] = deepcopy(changes_at)
         change_at = changes_at.pop(0)
 
-        q_evol: dict[Bandit, dict[int, float]] = {
-            bandit: {0: self.__q[bandit]} for bandit in self.__bandits
-        }
+        recorder.start(self.__q)
 
         mean_evol: dict[Bandit, list[float]] = {
             bandit: [bandit.mean] for bandit in self.__bandits
         }
 
-        rewards: list[float] = list()
-
         for game in range(iterations):
             if game == change_at:
                 self.change_environment(change_law)
@@ -60,9 +68,10 @@ class BanditEnvironment:
 
             bandit: Bandit = policy.act(self.__q)
             reward = bandit.pull_leaver()
+            policy.update(self.__q, bandit, reward)
 
             self.__q[bandit] = self.__q[bandit] + alpha * (reward - self.__q[bandit])
-            q_evol[bandit][game + 1] = self.__q[bandit]
-            rewards.append(reward)
+            recorder.record(game + 1, bandit, self.__q[bandit], reward)
 
-        return q_evol, mean_evol, rewards
+        recorder.close()
+        return recorder, mean_evol
@@ -1,63 +1,89 @@
 import os
-from copy import deepcopy
 
 import matplotlib.pyplot as plt
+import numpy as np
 import seaborn as sns
 from tabulate import tabulate
 
 from bandit.bandit import Bandit
+from bandit.recorder import Recorder
 
 
 class Info:
     @staticmethod
     def plot_convergence(
-        q_evol: dict[Bandit, dict[int, float]],
+        recorder: Recorder,
         mean_evol: dict[Bandit, list[float]],
         iterations: int,
         changes_at: list[int] | None = None,
     ) -> None:
         sns.set_theme(style="darkgrid")
         _, axes = plt.subplots(
-            nrows=len(q_evol),
+            nrows=len(recorder.bandits),
             ncols=1,
             sharex=True,
             sharey=True,
             constrained_layout=True,
         )
         axes = axes.flatten()
-        colors = sns.color_palette("husl", n_colors=len(q_evol))
+        colors = sns.color_palette("husl", n_colors=len(recorder.bandits))
 
         if not changes_at:
             changes_at = [-1]
 
-        for i, (bandit, ax) in enumerate(zip(q_evol.keys(), axes)):
-            copy_changes_at = deepcopy(changes_at)
-            change_at = copy_changes_at.pop(0)
-            popped = 1
-            means: list[float] = []
-            q_evols: list[float | None] = []
-            for j in range(iterations + 1):
-                means.append(mean_evol[bandit][popped - 1])
-                q_evols.append(q_evol[bandit][j] if j in q_evol[bandit] else None)
-                if j == change_at:
-                    change_at = copy_changes_at.pop(0) if copy_changes_at else -1
-                    popped += 1
-            ax.plot(range(iterations + 1), means, linestyle="--", color=colors[i])
-            ax.plot(range(iterations + 1), q_evols, marker=".", ms=2, color=colors[i])
+        for i, (bandit, ax) in enumerate(zip(recorder.bandits, axes)):
+            means = mean_evol[bandit]
+            edges = (
+                [0] + [c + 1 for c in changes_at[: len(means) - 1]] + [iterations + 1]
+            )
+            ax.plot(
+                range(iterations + 1),
+                np.repeat(means, np.diff(edges)),
+                linestyle="--",
+                color=colors[i],
+            )
+
+            for steps, q_values in recorder.q_evol(bandit):
+                ax.plot(steps, q_values, marker=".", ms=2, color=colors[i])
             ax.set_title(f"Q over time for {bandit}")
 
         # plt.subplot_tool()
         plt.show()
 
     @staticmethod
-    def log_q_evol(q_evol: dict[Bandit, dict[int, float]]):
-        if not os.path.exists("logs"):
-            os.mkdir("logs")
+    def plot_batch_results(
+        average_rewards: np.ndarray,
+        optimal_actions: np.ndarray,
+        changes_at: list[int] | None = None,
+    ) -> None:
+        sns.set_theme(style="darkgrid")
+        _, (reward_ax, optimal_ax) = plt.subplots(
+            nrows=2, ncols=1, sharex=True, constrained_layout=True
+        )
+
+        reward_ax.plot(average_rewards)
+        reward_ax.set_title("Average reward over time")
+        optimal_ax.plot(100 * optimal_actions)
+        optimal_ax.set_title("Optimal action (%) over time")
+
+        for change_at in changes_at or []:
+            reward_ax.axvline(change_at, linestyle="--", color="gray")
+            optimal_ax.axvline(change_at, linestyle="--", color="gray")
+
+        plt.show()
+
+    @staticmethod
+    def log_q_evol(recorder: Recorder, directory: str = "logs"):
+        if not os.path.exists(directory):
+            os.mkdir(directory)
 
-        for bandit in q_evol:
+        for bandit in recorder.bandits:
             to_log = []
-            for step in q_evol[bandit]:
-                to_log.append({"Moment": step, "Q-Value": q_evol[bandit][step]})
+            for steps, q_values in recorder.q_evol(bandit):
+                to_log.extend(
+                    {"Moment": step, "Q-Value": q_value}
+                    for step, q_value in zip(steps.tolist(), q_values.tolist())
+                )
 
-            with open(f"./logs/{bandit}.txt", "w") as blog:
+            with open(os.path.join(directory, f"{bandit}.txt"), "w") as blog:
                 blog.write(tabulate(to_log, headers="keys", tablefmt="rst"))
@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from random import choice
+from random import randrange
+
+import numpy as np
 
 from bandit.utils import *
 
@@ -9,24 +11,193 @@ class Policy(ABC):
     def act(self, q: Q) -> Bandit:
         pass
 
+    def act_batch(self, q: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        Slot of the arm played in every row of a (runs, arms) estimate array.
+        Plays each row through act; vectorized policies override this.
+        """
+        bandits = [Bandit(0.0, 0.0, id=slot) for slot in range(q.shape[1])]
+        arms = np.empty(q.shape[0], dtype=np.int64)
+        for run, values in enumerate(q.tolist()):
+            estimates = Q(bandits)
+            for bandit, value in zip(bandits, values):
+                estimates[bandit] = value
+            arms[run] = estimates.slot(self.act(estimates))
+
+        return arms
+
+    def update(self, q: Q, bandit: Bandit, reward: float) -> None:
+        pass
+
+    def update_batch(self, arms: np.ndarray, rewards: np.ndarray) -> None:
+        pass
+
 
 class GreedyPolicy(Policy):
     def act(self, q: Q) -> Bandit:
-        return max([(bandit, q[bandit]) for bandit in q], key=lambda x: x[1])[0]
+        return q.best
+
+    def act_batch(self, q: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        return np.argmax(q, axis=1)
 
 
 class RandomPolicy(Policy):
     def act(self, q: Q) -> Bandit:
-        return choice([bandit for bandit in q])
+        return q.bandits[randrange(len(q))]
+
+    def act_batch(self, q: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        return rng.integers(0, q.shape[1], size=q.shape[0])
 
 
 class EpsGreedyPolicy(Policy):
     def __init__(self, epsilon: float = 0.1) -> None:
         self.__epsilon = epsilon
+        self.__random_policy = RandomPolicy()
+        self.__greedy_policy = GreedyPolicy()
 
     def act(self, q: Q) -> Bandit:
         return (
-            RandomPolicy().act(q)
+            self.__random_policy.act(q)
             if random() < self.__epsilon
-            else GreedyPolicy().act(q)
+            else self.__greedy_policy.act(q)
         )
+
+    def act_batch(self, q: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        explore = rng.random(q.shape[0]) < self.__epsilon
+        return np.where(
+            explore,
+            self.__random_policy.act_batch(q, rng),
+            self.__greedy_policy.act_batch(q, rng),
+        )
+
+
+class UCBPolicy(Policy):
+    """
+    UCB1: plays the arm maximizing q + c * sqrt(ln t / n). Arms that were never
+    played score infinitely high, so each one is tried once first.
+    """
+
+    def __init__(self, c: float = 2.0) -> None:
+        self.__c = c
+        self.__counts: np.ndarray = np.zeros(0)
+
+    def __scores(self, q: np.ndarray) -> np.ndarray:
+        if self.__counts.shape != q.shape:
+            self.__counts = np.zeros(q.shape)
+
+        t = self.__counts.sum(axis=-1, keepdims=True) + 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bonus = self.__c * np.sqrt(np.log(t) / self.__counts)
+        return np.where(self.__counts == 0, np.inf, q + bonus)
+
+    def act(self, q: Q) -> Bandit:
+        return q.bandits[int(np.argmax(self.__scores(q.values)))]
+
+    def act_batch(self, q: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        return np.argmax(self.__scores(q), axis=1)
+
+    def update(self, q: Q, bandit: Bandit, reward: float) -> None:
+        self.__counts[q.slot(bandit)] += 1
+
+    def update_batch(self, arms: np.ndarray, rewards: np.ndarray) -> None:
+        self.__counts[np.arange(len(arms)), arms] += 1
+
+
+class GradientPolicy(Policy):
+    """
+    Gradient bandit: samples arms from softmax(H) over action preferences H and
+    moves H along the reward gradient, measured against the average reward.
+    """
+
+    def __init__(self, alpha: float = 0.1) -> None:
+        self.__alpha = alpha
+        self.__preferences: np.ndarray = np.zeros(0)
+        self.__baseline: np.ndarray = np.zeros(0)
+        self.__steps: int = 0
+        self.__probabilities: np.ndarray = np.zeros(0)
+
+    def __softmax(self, q: np.ndarray) -> np.ndarray:
+        if self.__preferences.shape != q.shape:
+            self.__preferences = np.zeros(q.shape)
+            self.__baseline = np.zeros(q.shape[:-1])
+            self.__steps = 0
+
+        exp = np.exp(
+            self.__preferences - self.__preferences.max(axis=-1, keepdims=True)
+        )
+        self.__probabilities = exp / exp.sum(axis=-1, keepdims=True)
+        return self.__probabilities
+
+    @staticmethod
+    def __sample(probabilities: np.ndarray, u: np.ndarray) -> np.ndarray:
+        chosen = (np.cumsum(probabilities, axis=-1) < u[..., None]).sum(axis=-1)
+        return np.minimum(chosen, probabilities.shape[-1] - 1)
+
+    def __step(self, rows: np.ndarray | int, arms: np.ndarray | int, rewards) -> None:
+        self.__steps += 1
+        self.__baseline += (rewards - self.__baseline) / self.__steps
+        advantage = rewards - self.__baseline
+
+        self.__preferences -= self.__alpha * advantage[..., None] * self.__probabilities
+        self.__preferences[rows, arms] += self.__alpha * advantage
+
+    def act(self, q: Q) -> Bandit:
+        probabilities = self.__softmax(q.values)
+        return q.bandits[
+            int(GradientPolicy.__sample(probabilities, np.array(random())))
+        ]
+
+    def act_batch(self, q: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        probabilities = self.__softmax(q)
+        return GradientPolicy.__sample(probabilities, rng.random(q.shape[0]))
+
+    def update(self, q: Q, bandit: Bandit, reward: float) -> None:
+        self.__step(..., q.slot(bandit), np.array(reward))
+
+    def update_batch(self, arms: np.ndarray, rewards: np.ndarray) -> None:
+        self.__step(np.arange(len(arms)), arms, rewards)
+
+
+class ThompsonPolicy(Policy):
+    """
+    Gaussian Thompson sampling: keeps a normal posterior over every arm's mean
+    from reward counts and sums, and plays the arm whose sampled mean is the
+    largest.
+    """
+
+    def __init__(
+        self,
+        prior_variance: float = 1.0,
+        noise_variance: float = 1.0,
+        seed: int | None = None,
+    ) -> None:
+        self.__prior_precision = 1.0 / prior_variance
+        self.__noise_precision = 1.0 / noise_variance
+        self.__rng: np.random.Generator = np.random.default_rng(seed)
+        self.__counts: np.ndarray = np.zeros(0)
+        self.__sums: np.ndarray = np.zeros(0)
+
+    def __sample(self, q: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        if self.__counts.shape != q.shape:
+            self.__counts = np.zeros(q.shape)
+            self.__sums = np.zeros(q.shape)
+
+        precision = self.__prior_precision + self.__noise_precision * self.__counts
+        mean = self.__noise_precision * self.__sums / precision
+        return mean + rng.standard_normal(q.shape) / np.sqrt(precision)
+
+    def act(self, q: Q) -> Bandit:
+        return q.bandits[int(np.argmax(self.__sample(q.values, self.__rng)))]
+
+    def act_batch(self, q: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        return np.argmax(self.__sample(q, rng), axis=1)
+
+    def update(self, q: Q, bandit: Bandit, reward: float) -> None:
+        slot = q.slot(bandit)
+        self.__counts[slot] += 1
+        self.__sums[slot] += reward
+
+    def update_batch(self, arms: np.ndarray, rewards: np.ndarray) -> None:
+        rows = np.arange(len(arms))
+        self.__counts[rows, arms] += 1
+        self.__sums[rows, arms] += rewards
@@ -0,0 +1,229 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Iterator
+
+import numpy as np
+
+from bandit.bandit import Bandit
+from bandit.utils import Q
+
+
+class Recorder(ABC):
+    """
+    Collects (step, arm, q, reward) records produced by BanditEnvironment.run.
+    Readers get the history back in chunks, so no recorder has to hand out
+    the whole run at once.
+    """
+
+    @property
+    def bandits(self) -> list[Bandit]:
+        return self.__bandits
+
+    def __init__(self) -> None:
+        self.__bandits: list[Bandit] = []
+
+    def start(self, q: Q) -> None:
+        self.__bandits = list(q)
+        for bandit in self.__bandits:
+            self.record(0, bandit, q[bandit], np.nan)
+
+    @abstractmethod
+    def record(self, step: int, bandit: Bandit, q: float, reward: float) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def q_evol(self, bandit: Bandit) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        pass
+
+    @abstractmethod
+    def rewards(self) -> Iterator[np.ndarray]:
+        pass
+
+
+class MemoryRecorder(Recorder):
+    """
+    Keeps the full history in memory. This is what BanditEnvironment.run used
+    to do on its own.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.__q_evol: dict[Bandit, dict[int, float]] = {}
+        self.__rewards: list[float] = []
+
+    def record(self, step: int, bandit: Bandit, q: float, reward: float) -> None:
+        self.__q_evol.setdefault(bandit, {})[step] = q
+        if step > 0:
+            self.__rewards.append(reward)
+
+    def q_evol(self, bandit: Bandit) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        evol = self.__q_evol.get(bandit, {})
+        yield (
+            np.fromiter(evol.keys(), dtype=np.int64, count=len(evol)),
+            np.fromiter(evol.values(), dtype=np.float64, count=len(evol)),
+        )
+
+    def rewards(self) -> Iterator[np.ndarray]:
+        yield np.array(self.__rewards, dtype=np.float64)
+
+
+class DecimatedSeries:
+    """
+    A (step, value) series holding at most `budget` points. Once full, every
+    other point is dropped and only every `stride`-th new point is kept, so
+    the series always spans the whole run at a coarser resolution.
+    """
+
+    @property
+    def steps(self) -> np.ndarray:
+        return self.__steps[: self.__size]
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.__values[: self.__size]
+
+    def __init__(self, budget: int) -> None:
+        if budget < 2:
+            raise ValueError("Budget must hold at least two points!")
+
+        self.__steps: np.ndarray = np.empty(budget, dtype=np.int64)
+        self.__values: np.ndarray = np.empty(budget, dtype=np.float64)
+        self.__size: int = 0
+        self.__stride: int = 1
+        self.__seen: int = 0
+
+    def append(self, step: int, value: float) -> None:
+        seen, self.__seen = self.__seen, self.__seen + 1
+        if seen % self.__stride:
+            return
+
+        if self.__size == len(self.__steps):
+            kept = (self.__size + 1) // 2
+            self.__steps[:kept] = self.__steps[: self.__size : 2]
+            self.__values[:kept] = self.__values[: self.__size : 2]
+            self.__size = kept
+            self.__stride *= 2
+            if seen % self.__stride:
+                return
+
+        self.__steps[self.__size] = step
+        self.__values[self.__size] = value
+        self.__size += 1
+
+
+class DecimatingRecorder(Recorder):
+    """
+    Keeps at most `budget` Q points per arm and `budget` rewards in memory,
+    regardless of how long the run is.
+    """
+
+    def __init__(self, budget: int = 1000) -> None:
+        super().__init__()
+        self.__budget: int = budget
+        self.__q_evol: dict[Bandit, DecimatedSeries] = {}
+        self.__rewards: DecimatedSeries = DecimatedSeries(budget)
+
+    def record(self, step: int, bandit: Bandit, q: float, reward: float) -> None:
+        if bandit not in self.__q_evol:
+            self.__q_evol[bandit] = DecimatedSeries(self.__budget)
+
+        self.__q_evol[bandit].append(step, q)
+        if step > 0:
+            self.__rewards.append(step, reward)
+
+    def q_evol(self, bandit: Bandit) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        if bandit in self.__q_evol:
+            yield self.__q_evol[bandit].steps, self.__q_evol[bandit].values
+
+    def rewards(self) -> Iterator[np.ndarray]:
+        yield self.__rewards.values
+
+
+class FileRecorder(Recorder):
+    """
+    Streams records to a directory holding one raw binary file per column
+    (step, arm, q, reward). Records are buffered in `chunk`-sized arrays and
+    read back through numpy.memmap one chunk at a time.
+    """
+
+    COLUMNS: dict[str, type] = {
+        "step": np.int64,
+        "arm": np.int64,
+        "q": np.float64,
+        "reward": np.float64,
+    }
+
+    def __init__(self, path: str = "logs/q_evol", chunk: int = 65536) -> None:
+        super().__init__()
+        self.__path: str = path
+        self.__chunk: int = chunk
+        self.__buffers: dict[str, np.ndarray] = {
+            column: np.empty(chunk, dtype=dtype)
+            for column, dtype in FileRecorder.COLUMNS.items()
+        }
+        self.__size: int = 0
+        self.__written: int = 0
+
+        os.makedirs(self.__path, exist_ok=True)
+        for column in FileRecorder.COLUMNS:
+            open(self.__column_path(column), "wb").close()
+
+    def __column_path(self, column: str) -> str:
+        return os.path.join(self.__path, f"{column}.bin")
+
+    def __flush(self) -> None:
+        for column, buffer in self.__buffers.items():
+            with open(self.__column_path(column), "ab") as file:
+                buffer[: self.__size].tofile(file)
+
+        self.__written += self.__size
+        self.__size = 0
+
+    def __columns(self) -> dict[str, np.ndarray]:
+        self.__flush()
+        if not self.__written:
+            return {
+                column: np.empty(0, dtype=dtype)
+                for column, dtype in FileRecorder.COLUMNS.items()
+            }
+
+        return {
+            column: np.memmap(
+                self.__column_path(column),
+                dtype=dtype,
+                mode="r",
+                shape=(self.__written,),
+            )
+            for column, dtype in FileRecorder.COLUMNS.items()
+        }
+
+    def record(self, step: int, bandit: Bandit, q: float, reward: float) -> None:
+        self.__buffers["step"][self.__size] = step
+        self.__buffers["arm"][self.__size] = bandit.id
+        self.__buffers["q"][self.__size] = q
+        self.__buffers["reward"][self.__size] = reward
+        self.__size += 1
+
+        if self.__size == self.__chunk:
+            self.__flush()
+
+    def close(self) -> None:
+        self.__flush()
+
+    def q_evol(self, bandit: Bandit) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        columns = self.__columns()
+        for start in range(0, self.__written, self.__chunk):
+            chunk = slice(start, start + self.__chunk)
+            mask = columns["arm"][chunk] == bandit.id
+            yield np.asarray(columns["step"][chunk][mask]), np.asarray(
+                columns["q"][chunk][mask]
+            )
+
+    def rewards(self) -> Iterator[np.ndarray]:
+        columns = self.__columns()
+        for start in range(0, self.__written, self.__chunk):
+            chunk = slice(start, start + self.__chunk)
+            yield np.asarray(columns["reward"][chunk][columns["step"][chunk] > 0])
@@ -0,0 +1,121 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from bandit.batch import BatchBanditEnvironment, BatchLaw
+from bandit.policy import Policy
+
+
+@dataclass
+class SweepConfig:
+    policy: Policy
+    alpha: float = 0.1
+    is_stationary: bool = True
+    changes_at: list[int] | None = None
+    change_law: BatchLaw | None = None
+
+
+@dataclass
+class CurveStats:
+    """
+    Per-step averages over `runs` testbeds. Two stats over disjoint runs of the
+    same configuration merge into the stats over all of them.
+    """
+
+    runs: int = 0
+    average_rewards: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    optimal_actions: np.ndarray = field(default_factory=lambda: np.zeros(0))
+
+    def merge(self, other: "CurveStats") -> "CurveStats":
+        if not self.runs:
+            return other
+        if not other.runs:
+            return self
+
+        runs = self.runs + other.runs
+        return CurveStats(
+            runs,
+            (self.runs * self.average_rewards + other.runs * other.average_rewards)
+            / runs,
+            (self.runs * self.optimal_actions + other.runs * other.optimal_actions)
+            / runs,
+        )
+
+
+class Sweep:
+    """
+    Runs every configuration on `runs` testbeds, split into chunks of at most
+    `chunk` testbeds that are played by a process pool. Each chunk gets its own
+    seed spawned from `seed`, so a sweep is reproducible regardless of how
+    chunks are scheduled, and only the per-step averages travel back.
+    """
+
+    def __init__(
+        self,
+        law: BatchLaw,
+        arms: int = 10,
+        runs: int = 2000,
+        iterations: int = 1000,
+        chunk: int = 250,
+        workers: int | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.__law = law
+        self.__arms: int = arms
+        self.__runs: int = runs
+        self.__iterations: int = iterations
+        self.__chunk: int = chunk
+        self.__workers: int | None = workers
+        self.__seed: int | None = seed
+
+    @staticmethod
+    def run_chunk(
+        config: SweepConfig,
+        law: BatchLaw,
+        runs: int,
+        arms: int,
+        iterations: int,
+        seed: np.random.SeedSequence,
+    ) -> CurveStats:
+        env = BatchBanditEnvironment.from_law(
+            runs, arms, law, is_stationary=config.is_stationary, seed=seed
+        )
+        average_rewards, optimal_actions = env.run(
+            policy=config.policy,
+            iterations=iterations,
+            changes_at=config.changes_at,
+            change_law=config.change_law,
+            alpha=config.alpha,
+        )
+        return CurveStats(runs, average_rewards, optimal_actions)
+
+    def run(self, configs: list[SweepConfig]) -> list[CurveStats]:
+        sizes = [
+            min(self.__chunk, self.__runs - start)
+            for start in range(0, self.__runs, self.__chunk)
+        ]
+        seeds = np.random.SeedSequence(self.__seed).spawn(len(configs) * len(sizes))
+
+        stats = [CurveStats() for _ in configs]
+        with ProcessPoolExecutor(max_workers=self.__workers) as executor:
+            futures = [
+                (
+                    i,
+                    executor.submit(
+                        Sweep.run_chunk,
+                        config,
+                        self.__law,
+                        size,
+                        self.__arms,
+                        self.__iterations,
+                        seeds[i * len(sizes) + j],
+                    ),
+                )
+                for i, config in enumerate(configs)
+                for j, size in enumerate(sizes)
+            ]
+            for i, future in futures:
+                stats[i] = stats[i].merge(future.result())
+
+        return stats
@@ -1,23 +1,59 @@
 from dataclasses import dataclass
 
+import numpy as np
+
 from bandit.bandit import *
 
 
 @dataclass
 class Q:
+    """
+    Q estimates stored in a float array indexed by arm slot. The greedy arm is
+    cached and kept up to date on every assignment, so it can be read in O(1).
+    """
+
     @property
     def q(self) -> dict[Bandit, float]:
+        return {bandit: float(value) for bandit, value in zip(self.__bandits, self.__q)}
+
+    @property
+    def values(self) -> np.ndarray:
         return self.__q
 
+    @property
+    def bandits(self) -> list[Bandit]:
+        return self.__bandits
+
+    @property
+    def best(self) -> Bandit:
+        return self.__bandits[self.__best]
+
     def __init__(self, bandits: list[Bandit]) -> None:
         self.__bandits: list[Bandit] = bandits
-        self.__q: dict[Bandit, float] = {bandit: 0.0 for bandit in self.__bandits}
+        self.__index: dict[int, int] = {
+            bandit.id: slot for slot, bandit in enumerate(self.__bandits)
+        }
+        self.__q: np.ndarray = np.zeros(len(self.__bandits), dtype=np.float64)
+        self.__best: int = 0
+
+    def slot(self, key: Bandit) -> int:
+        return self.__index[key.id]
 
     def __getitem__(self, key: Bandit) -> float:
-        return self.__q[key]
+        return float(self.__q[self.__index[key.id]])
 
     def __setitem__(self, key: Bandit, value: float) -> None:
-        self.__q[key] = value
+        slot = self.__index[key.id]
+        best_value = self.__q[self.__best]
+        self.__q[slot] = value
+
+        if value > best_value or (value == best_value and slot < self.__best):
+            self.__best = slot
+        elif slot == self.__best and value < best_value:
+            self.__best = int(np.argmax(self.__q))
 
     def __iter__(self):
-        return iter(self.__q)
+        return iter(self.__bandits)
+
+    def __len__(self) -> int:
+        return len(self.__bandits)
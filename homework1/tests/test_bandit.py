@@ -5,7 +5,13 @@ def change_law():
     return 10 * (random() - 0.5), 5 * random()
 
 
-def test_bandit():
+def batch_change_law(
+    rng: np.random.Generator, shape: tuple[int, int]
+) -> tuple[np.ndarray, np.ndarray]:
+    return 10 * (rng.random(shape) - 0.5), 5 * rng.random(shape)
+
+
+def test_bandit(tmp_path):
     NO_BANDITS = 5
     IS_STATIONARY = False
     ITERATIONS = 10000
@@ -13,11 +19,146 @@ def test_bandit():
 
     bandits = [Bandit(10 * (random() - 0.5), 5 * random()) for _ in range(NO_BANDITS)]
     env = BanditEnvironment(bandits, is_stationary=IS_STATIONARY)
-    q_evol, mean_evol, rewards = env.run(
+    recorder, mean_evol = env.run(
         policy=EpsGreedyPolicy(),
         iterations=ITERATIONS,
         changes_at=CHANGES_AT,
         change_law=change_law,
     )
-    Info.plot_convergence(q_evol, mean_evol, ITERATIONS, CHANGES_AT)
-    Info.log_q_evol(q_evol)
+    Info.plot_convergence(recorder, mean_evol, ITERATIONS, CHANGES_AT)
+    Info.log_q_evol(recorder, str(tmp_path))
+    assert len(list(tmp_path.glob("bandit*.txt"))) == NO_BANDITS
+
+
+def test_bandit_recorders(tmp_path):
+    NO_BANDITS = 5
+    IS_STATIONARY = False
+    ITERATIONS = 100000
+    CHANGES_AT = [2000, 10000, 60000, 90000]
+    BUDGET = 500
+
+    bandits = [Bandit(10 * (random() - 0.5), 5 * random()) for _ in range(NO_BANDITS)]
+    for recorder in [
+        DecimatingRecorder(BUDGET),
+        FileRecorder(str(tmp_path / "q_evol"), 4096),
+    ]:
+        env = BanditEnvironment(bandits, is_stationary=IS_STATIONARY)
+        recorder, mean_evol = env.run(
+            policy=EpsGreedyPolicy(),
+            iterations=ITERATIONS,
+            changes_at=CHANGES_AT,
+            change_law=change_law,
+            recorder=recorder,
+        )
+        assert sum(len(rewards) for rewards in recorder.rewards()) <= ITERATIONS
+        Info.plot_convergence(recorder, mean_evol, ITERATIONS, CHANGES_AT)
+
+    assert sum(len(rewards) for rewards in recorder.rewards()) == ITERATIONS
+
+
+def test_batch_bandit():
+    RUNS = 2000
+    NO_BANDITS = 10
+    IS_STATIONARY = False
+    ITERATIONS = 10000
+    CHANGES_AT = [200, 1000, 6000, 9000]
+
+    env = BatchBanditEnvironment.from_law(
+        RUNS, NO_BANDITS, batch_change_law, is_stationary=IS_STATIONARY, seed=0
+    )
+    average_rewards, optimal_actions = env.run(
+        policy=EpsGreedyPolicy(),
+        iterations=ITERATIONS,
+        changes_at=CHANGES_AT,
+        change_law=batch_change_law,
+    )
+    assert average_rewards.shape == optimal_actions.shape == (ITERATIONS,)
+    assert 0.0 <= optimal_actions.min() <= optimal_actions.max() <= 1.0
+    Info.plot_batch_results(average_rewards, optimal_actions, CHANGES_AT)
+
+    # The seed covers the changes of the environment as well.
+    again = BatchBanditEnvironment.from_law(
+        RUNS, NO_BANDITS, batch_change_law, is_stationary=IS_STATIONARY, seed=0
+    )
+    assert np.array_equal(
+        (average_rewards, optimal_actions),
+        again.run(
+            policy=EpsGreedyPolicy(),
+            iterations=ITERATIONS,
+            changes_at=CHANGES_AT,
+            change_law=batch_change_law,
+        ),
+    )
+
+
+def test_q_best():
+    NO_BANDITS = 1000
+
+    bandits = [Bandit(10 * (random() - 0.5), 5 * random()) for _ in range(NO_BANDITS)]
+    q = Q(bandits)
+    for _ in range(10 * NO_BANDITS):
+        bandit = RandomPolicy().act(q)
+        q[bandit] = 10 * (random() - 0.5)
+        assert q.best == max(q, key=lambda b: q[b])
+
+
+def test_sweep():
+    EPSILONS = [0.0, 0.01, 0.1]
+    CHANGES_AT = [200, 600]
+
+    sweep = Sweep(
+        batch_change_law, runs=400, iterations=1000, chunk=100, workers=2, seed=0
+    )
+    configs = [
+        SweepConfig(
+            EpsGreedyPolicy(epsilon),
+            is_stationary=False,
+            changes_at=CHANGES_AT,
+            change_law=batch_change_law,
+        )
+        for epsilon in EPSILONS
+    ]
+    stats = sweep.run(configs)
+    assert [s.runs for s in stats] == [400] * len(EPSILONS)
+
+    again = sweep.run(configs)
+    for s, a in zip(stats, again):
+        assert np.array_equal(s.average_rewards, a.average_rewards)
+
+
+def test_policies():
+    NO_BANDITS = 10
+    ITERATIONS = 5000
+    POLICIES = [UCBPolicy(), GradientPolicy(), ThompsonPolicy(seed=0)]
+
+    for policy in POLICIES:
+        bandits = [
+            Bandit(10 * (random() - 0.5), 5 * random()) for _ in range(NO_BANDITS)
+        ]
+        env = BanditEnvironment(bandits)
+        recorder, _ = env.run(policy=policy, iterations=ITERATIONS)
+        assert sum(len(rewards) for rewards in recorder.rewards()) == ITERATIONS
+
+    for policy in [UCBPolicy(), GradientPolicy(), ThompsonPolicy()]:
+        env = BatchBanditEnvironment.from_law(
+            2000, NO_BANDITS, batch_change_law, seed=0
+        )
+        _, optimal_actions = env.run(policy=policy, iterations=1000)
+        assert optimal_actions[-100:].mean() > 0.5
+
+
+def test_default_batch_policy():
+    class FirstArmPolicy(Policy):
+        def act(self, q: Q) -> Bandit:
+            return q.bandits[0]
+
+    # A policy that only implements act still runs on batches, row by row.
+    env = BatchBanditEnvironment.from_law(50, 5, batch_change_law, seed=0)
+    _, optimal_actions = env.run(policy=FirstArmPolicy(), iterations=10)
+    assert np.allclose(optimal_actions, np.mean(np.argmax(env.means, axis=1) == 0))
+
+    rng = np.random.default_rng(0)
+    q = rng.random((20, 5))
+    assert np.array_equal(
+        Policy.act_batch(GreedyPolicy(), q, rng), GreedyPolicy().act_batch(q, rng)
+    )
@@ -0,0 +1,160 @@
+"""
+Timings and peak memory of the maze dynamic-programming stack.
+
+Run from the homework2 directory with
+
+    python -m benchmarks.dyn_prog --output results.json
+
+Every case builds a base, its environment, runs Q and V iteration (the
+original and the vectorized solvers) for a fixed number of sweeps and
+extracts the greedy policy, on boards and graphs of several sizes and both
+environment types. Seeds are fixed, so two result files can be compared
+case by case. Peak memory is traced in a second, untimed run of every step.
+"""
+
+import json
+import platform
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from io import StringIO
+from random import seed
+from time import perf_counter
+from tracemalloc import get_traced_memory, start, stop
+
+import numpy as np
+from tabulate import tabulate
+
+from maze import *
+
+BOARD_SIZES = [8, 16, 32]
+GRAPH_SIZES = [16, 64, 256]
+SWEEPS = 10
+GAMMA = 0.9
+SPECS = [
+    (10, lambda: RegularCell(-1)),
+    (2, lambda: RegularCell(-10)),
+    (2, lambda: WallCell(-11)),
+    (1, lambda: TerminalCell(-1)),
+    (1, lambda: TeleportCell()),
+]
+
+
+def measure(call, *args, **kwargs) -> tuple[float, int, object]:
+    """
+    Seconds taken by the call and the peak of memory allocated during a
+    repeated, traced call. Solver output is swallowed.
+    """
+    with redirect_stdout(StringIO()):
+        begin = perf_counter()
+        result = call(*args, **kwargs)
+        elapsed = perf_counter() - begin
+
+        start()
+        call(*args, **kwargs)
+        _, peak = get_traced_memory()
+        stop()
+
+    return elapsed, peak, result
+
+
+def seeded(call, case_seed: int):
+    def wrapper(*args, **kwargs):
+        seed(case_seed)
+        np.random.seed(case_seed)
+        return call(*args, **kwargs)
+
+    return wrapper
+
+
+def bench_case(kind: str, size: int, env_type: EnvType) -> dict[str, dict]:
+    case_seed = size
+    if kind == "board":
+        build = seeded(lambda: MazeBoard(size=(size, size), specs=SPECS), case_seed)
+    else:
+        build = seeded(lambda: MazeGraph(size, specs=SPECS), case_seed)
+
+    steps: dict[str, dict] = {}
+
+    def step(name: str, call, *args, **kwargs):
+        elapsed, peak, result = measure(seeded(call, case_seed), *args, **kwargs)
+        steps[name] = {"seconds": elapsed, "peak_bytes": peak}
+        return result
+
+    base = step("base", build)
+    env = step("environment", MazeEnvironment, base=base, env_type=env_type)
+
+    solved = {}
+    for name, solver in [
+        ("q_iteration", QIteration),
+        ("v_iteration", VIteration),
+        ("vectorized_q_iteration", VectorizedQIteration),
+        ("vectorized_v_iteration", VectorizedVIteration),
+    ]:
+
+        def run(solver=solver):
+            iteration = solver(env, gamma=GAMMA)
+            iteration.run(eps=0.0, iterations=SWEEPS)
+            return iteration
+
+        solved[name] = step(name, run)
+
+    v = solved["vectorized_v_iteration"].v
+    step(
+        "greedy_policy",
+        lambda: [GreedyPolicy().act(s, env, v, GAMMA) for s in env.states],
+    )
+    step("cached_greedy_policy", lambda: CachedGreedyPolicy().table(env, v, GAMMA))
+
+    return {
+        "base": kind,
+        "size": size,
+        "env_type": env_type.name,
+        "states": len(env.states),
+        "steps": steps,
+    }
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--boards", type=int, nargs="*", default=BOARD_SIZES)
+    parser.add_argument("--graphs", type=int, nargs="*", default=GRAPH_SIZES)
+    parser.add_argument("--output", help="JSON file for the results")
+    args = parser.parse_args()
+
+    cases = [
+        bench_case(kind, size, env_type)
+        for kind, sizes in [("board", args.boards), ("graph", args.graphs)]
+        for size in sizes
+        for env_type in [EnvType.DETERMINISTIC, EnvType.STOCHASTIC]
+    ]
+    results = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sweeps": SWEEPS,
+        "cases": cases,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+    print(
+        tabulate(
+            [
+                {
+                    "Case": f"{case['base']} {case['size']} {case['env_type']}",
+                    "Step": name,
+                    "Time (ms)": 1e3 * step["seconds"],
+                    "Peak (KiB)": step["peak_bytes"] / 1024,
+                }
+                for case in cases
+                for name, step in case["steps"].items()
+            ],
+            "keys",
+            "rst",
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
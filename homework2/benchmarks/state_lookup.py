@@ -0,0 +1,60 @@
+"""
+Scaling of State-keyed lookups on boards from 8x8 to 128x128.
+
+Run from the homework2 directory with
+
+    python -m benchmarks.state_lookup
+
+With a working State hash, the time per state of every column should stay
+roughly flat as the board grows.
+"""
+
+from random import seed
+from time import perf_counter
+
+import numpy as np
+from tabulate import tabulate
+
+from maze import *
+
+SIZES = [8, 16, 32, 64, 128]
+SPECS = [
+    (10, lambda: RegularCell(-1)),
+    (2, lambda: RegularCell(-10)),
+    (2, lambda: WallCell(-11)),
+    (1, lambda: TerminalCell(-1)),
+    (1, lambda: TeleportCell()),
+]
+
+
+def timed(call, *args, **kwargs) -> tuple[float, object]:
+    start = perf_counter()
+    result = call(*args, **kwargs)
+    return perf_counter() - start, result
+
+
+def bench_size(size: int) -> dict[str, float]:
+    seed(size)
+    np.random.seed(size)
+
+    t_board, base = timed(MazeBoard, size=(size, size), specs=SPECS)
+    t_env, env = timed(MazeEnvironment, base=base, env_type=EnvType.STOCHASTIC)
+    v = V(env=env)
+
+    t_lookup, _ = timed(lambda: [v[State(s.position)] for s in env.states])
+    t_sweep, _ = timed(VIteration(env, gamma=0.9).run, eps=0.0, iterations=1)
+
+    no_states = len(env.states)
+    return {
+        "Board": f"{size}x{size}",
+        "States": no_states,
+        "Board build (s)": t_board,
+        "Env build (s)": t_env,
+        "V lookup (us/state)": 1e6 * t_lookup / no_states,
+        "V sweep (us/state)": 1e6 * t_sweep / no_states,
+    }
+
+
+if __name__ == "__main__":
+    bench_size(SIZES[0])  # warm-up
+    print(tabulate([bench_size(size) for size in SIZES], "keys", "rst"))
@@ -2,4 +2,16 @@ from maze.base import *
 from maze.env import MazeEnvironment
 from maze.info import Info
 from maze.policy import *
-from maze.dyn_prog import QIteration, VIteration
+from maze.dyn_prog import (
+    QIteration,
+    VIteration,
+    VectorizedQIteration,
+    VectorizedVIteration,
+    GaussSeidelVIteration,
+    PrioritizedSweepingVIteration,
+    IncrementalVIteration,
+    PolicyIteration,
+)
+from maze.mdp import CompiledMDP
+from maze.snapshot import Snapshot
+from maze.export import TransitionExport
@@ -1,6 +1,8 @@
 from random import randint, choice, choices
 from typing import Any
 
+import numpy as np
+
 from maze.utils import *
 
 
@@ -18,10 +20,16 @@ class MazeBase(ABC):
         return self.__connections
 
     def __init__(
-        self, positions: list[list[int]], specs: list[tuple[float, Callable]]
+        self,
+        positions: list[list[int]],
+        specs: list[tuple[float, Callable]],
+        cells: list[Cell] | None = None,
     ) -> None:
+        if cells is None:
+            cells = CellGen().generate(specs, len(positions))
+
         self.__nodes: dict[State, Cell] = {
-            State(position): CellGen()(specs) for position in positions
+            State(position): cell for position, cell in zip(positions, cells)
         }
 
         self.__connections: dict[State, dict[Direction, State]] = {
@@ -29,15 +37,34 @@ class MazeBase(ABC):
         }
 
     def __getitem__(self, state: Any) -> Cell:
-        return self.__nodes[state if isinstance(state, State) else State(list(state))]
+        return self.__nodes[state if isinstance(state, State) else State(state)]
+
+    def __setitem__(self, state: Any, cell: Cell) -> None:
+        """
+        Replaces the cell at a node. Teleports leading to the replaced cell
+        lead to the new one, unless it can not be teleported onto.
+        """
+        state = state if isinstance(state, State) else State(state)
+        old = self.__nodes[state]
+        self.__nodes[state] = cell
+
+        for other in self.__nodes.values():
+            if isinstance(other, TeleportCell) and other.teleport_to is old:
+                other.teleport_to = (
+                    None if isinstance(cell, (WallCell, TeleportCell)) else cell
+                )
+
+        self.set_teleport(keep=True)
 
     def __iter__(self):
         return iter(self.__nodes)
 
-    def set_teleport(self) -> None:
+    def set_teleport(self, keep: bool = False) -> None:
         """
         Private method for configuring teleport cells - to what
         cells will agent teleport when stepped onto teleport cell.
+        With keep, only teleport cells without a target draw one and
+        the others keep theirs, e.g. after a cell was replaced.
         """
 
         valid_teleports = [
@@ -49,7 +76,8 @@ class MazeBase(ABC):
         for node in self.__nodes:
             cell = self.__nodes[node]
             if isinstance(cell, TeleportCell):
-                cell.teleport_to = choice(valid_teleports)
+                if not keep or cell.teleport_to is None:
+                    cell.teleport_to = choice(valid_teleports)
 
     def find_position(self, cell: Cell) -> State:
         return list(self.__nodes.keys())[list(self.__nodes.values()).index(cell)]
@@ -60,6 +88,155 @@ class MazeBase(ABC):
     def get_from(self, node: State, direction: Direction) -> State:
         return self.__connections[node][direction]
 
+    def transitions(
+        self,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Follows every direction out of every state once, resolving walls,
+        board edges and teleports. States are the steppable, non-teleport
+        nodes, indexed in iteration order. Returns
+
+        - positions[s] - position of state s,
+        - next_states[s, d] - index of the state reached from s following d,
+        - rewards[s, d] - reward for following d from s,
+        - valid[s, d] - whether d is available in s,
+        - terminal[s] - whether s is terminal.
+        """
+        directions = Direction.get_all_directions()
+        states = [
+            node
+            for node in self.__nodes
+            if self.__nodes[node].is_steppable
+            and not isinstance(self.__nodes[node], TeleportCell)
+        ]
+        index: dict[State, int] = {s: i for i, s in enumerate(states)}
+        positions: dict[int, State] = {id(cell): n for n, cell in self.__nodes.items()}
+
+        next_states = np.tile(np.arange(len(states))[:, None], (1, len(directions)))
+        rewards = np.zeros((len(states), len(directions)), dtype=np.float64)
+        valid = np.zeros((len(states), len(directions)), dtype=bool)
+        terminal = np.array([self[s].is_terminal for s in states], dtype=bool)
+
+        for i, state in enumerate(states):
+            for direction, next_state in self.__connections[state].items():
+                d = directions.index(direction)
+
+                if isinstance(self.__nodes[next_state], WallCell):
+                    next_state = state
+                    new_cell = self[next_state]
+                    reward = new_cell.reward
+                elif next_state == state:
+                    new_cell = self[next_state]
+                    reward = -11
+                else:
+                    new_cell = self[next_state]
+                    reward = new_cell.reward
+
+                if isinstance(new_cell, TeleportCell):
+                    next_state = positions[id(new_cell.teleport_to)]
+
+                next_states[i, d] = index[next_state]
+                rewards[i, d] = reward
+                valid[i, d] = True
+
+        return (
+            np.array([s.position for s in states], dtype=np.int64),
+            next_states,
+            rewards,
+            valid,
+            terminal,
+        )
+
+    def layout(self) -> dict[str, np.ndarray]:
+        """
+        The maze as plain arrays over its nodes, in iteration order: their
+        positions, cell kinds, rewards (NaN for teleports), teleport targets
+        (-1 for other cells) and the connections in CSR form.
+        """
+        nodes = list(self.__nodes)
+        node_index = {node: i for i, node in enumerate(nodes)}
+        cell_index = {id(cell): i for i, cell in enumerate(self.__nodes.values())}
+        directions = Direction.get_all_directions()
+
+        cells = list(self.__nodes.values())
+        teleports = [isinstance(cell, TeleportCell) for cell in cells]
+        degrees = [len(self.__connections[node]) for node in nodes]
+
+        return {
+            "positions": np.array([node.position for node in nodes], dtype=np.int64),
+            "kinds": np.array([cell.kind for cell in cells], dtype=np.int8),
+            "rewards": np.array(
+                [np.nan if t else cell.reward for t, cell in zip(teleports, cells)],
+                dtype=np.float64,
+            ),
+            "teleport_to": np.array(
+                [
+                    cell_index[id(cell.teleport_to)] if t else -1
+                    for t, cell in zip(teleports, cells)
+                ],
+                dtype=np.int64,
+            ),
+            "indptr": np.concatenate(([0], np.cumsum(degrees))).astype(np.int64),
+            "indices": np.array(
+                [
+                    node_index[target]
+                    for node in nodes
+                    for target in self.__connections[node].values()
+                ],
+                dtype=np.int64,
+            ),
+            "edge_directions": np.array(
+                [
+                    directions.index(direction)
+                    for node in nodes
+                    for direction in self.__connections[node]
+                ],
+                dtype=np.int8,
+            ),
+        }
+
+    @staticmethod
+    def cells_from_layout(layout: dict[str, np.ndarray]) -> list[Cell]:
+        """
+        Rebuilds the cells described by a layout, teleport targets included.
+        """
+        kinds = {
+            CellKind.REGULAR: RegularCell,
+            CellKind.TERMINAL: TerminalCell,
+            CellKind.WALL: WallCell,
+        }
+        cells = [
+            TeleportCell() if kind == CellKind.TELEPORT else kinds[kind](reward)
+            for kind, reward in zip(
+                layout["kinds"].tolist(), layout["rewards"].tolist()
+            )
+        ]
+
+        for cell, target in zip(cells, layout["teleport_to"].tolist()):
+            if target >= 0:
+                cell.teleport_to = cells[target]
+
+        return cells
+
+    def connect_from_layout(self, layout: dict[str, np.ndarray]) -> None:
+        """
+        Restores the connections described by a layout.
+        """
+        nodes = list(self.__nodes)
+        directions = Direction.get_all_directions()
+        indptr = layout["indptr"].tolist()
+        indices = layout["indices"].tolist()
+        edge_directions = layout["edge_directions"].tolist()
+
+        for i, node in enumerate(nodes):
+            self.__connections[node] = {
+                directions[d]: nodes[target]
+                for d, target in zip(
+                    edge_directions[indptr[i] : indptr[i + 1]],
+                    indices[indptr[i] : indptr[i + 1]],
+                )
+            }
+
     @abstractmethod
     def set_maze(self) -> None:
         pass
@@ -70,9 +247,25 @@ class MazeGraph(MazeBase):
     Inherited from MazeBase class - it models a graph.
     """
 
-    def __init__(self, size: int, specs: list[tuple[float, Callable]]) -> None:
-        super().__init__(positions=[[i] for i in range(size)], specs=specs)
-        self.set_maze()
+    def __init__(
+        self,
+        size: int,
+        specs: list[tuple[float, Callable]],
+        cells: list[Cell] | None = None,
+    ) -> None:
+        super().__init__(positions=[[i] for i in range(size)], specs=specs, cells=cells)
+        if cells is None:
+            self.set_maze()
+
+    @classmethod
+    def from_layout(cls, layout: dict[str, np.ndarray]) -> "MazeGraph":
+        graph = cls(
+            size=len(layout["kinds"]),
+            specs=[],
+            cells=MazeBase.cells_from_layout(layout),
+        )
+        graph.connect_from_layout(layout)
+        return graph
 
     def set_maze(self) -> None:
         """
@@ -90,13 +283,14 @@ class MazeGraph(MazeBase):
 
         # CUSTOM NUMBER OF DIRECTIONS USED PER NODE
         directions = Direction.get_all_directions()
+        nodes = list(self.nodes.keys())
         for node in self.connections:
             if isinstance(self[node], RegularCell):
                 no_dirs = randint(1, len(directions))
                 possible_directions = choices(directions, k=no_dirs)
                 # possible_directions = directions
                 for d in possible_directions:
-                    self.connections[node][d] = choice(list(self.nodes.keys()))
+                    self.connections[node][d] = choice(nodes)
 
 
 class MazeBoard(MazeBase):
@@ -117,44 +311,61 @@ class MazeBoard(MazeBase):
         return self.__rows_no, self.__cols_no
 
     def __init__(
-        self, size: tuple[int, int], specs: list[tuple[float, Callable]]
+        self,
+        size: tuple[int, int],
+        specs: list[tuple[float, Callable]],
+        cells: list[Cell] | None = None,
     ) -> None:
         self.__rows_no, self.__cols_no = size
 
         super().__init__(
             positions=[[i, j] for i in range(size[0]) for j in range(size[1])],
             specs=specs,
+            cells=cells,
         )
 
-        self.set_maze()
+        # Cells restored from a layout already know where they teleport to.
+        self.set_teleport(keep=True)
+        self.__connect()
+
+    @classmethod
+    def from_layout(cls, layout: dict[str, np.ndarray]) -> "MazeBoard":
+        rows_no, cols_no = (layout["positions"].max(axis=0) + 1).tolist()
+        if len(layout["kinds"]) != rows_no * cols_no:
+            raise ValueError("Layout does not cover every cell of the board!")
+
+        return cls(
+            size=(rows_no, cols_no),
+            specs=[],
+            cells=MazeBase.cells_from_layout(layout),
+        )
 
-    def __right(self, position: State) -> list[int]:
-        row, col = position[0], position[1]
-        if col != self.__cols_no - 1:
-            if self[row, col + 1].is_steppable:
-                return [row, col + 1]
-        return [row, col]
-
-    def __left(self, position: State) -> list[int]:
-        row, col = position[0], position[1]
-        if col != 0:
-            if self[row, col - 1].is_steppable:
-                return [row, col - 1]
-        return [row, col]
-
-    def __up(self, position: State) -> list[int]:
-        row, col = position[0], position[1]
-        if row != 0:
-            if self[row - 1, col].is_steppable:
-                return [row - 1, col]
-        return [row, col]
-
-    def __down(self, position: State) -> list[int]:
-        row, col = position[0], position[1]
-        if row != self.__rows_no - 1:
-            if self[row + 1, col].is_steppable:
-                return [row + 1, col]
-        return [row, col]
+    def __setitem__(self, state: Any, cell: Cell) -> None:
+        # Steppability decides where moves lead, so the board is reconnected.
+        super().__setitem__(state, cell)
+        self.__connect()
+
+    @staticmethod
+    def neighbours(steppable: np.ndarray) -> dict[Direction, np.ndarray]:
+        """
+        For a (rows, cols) mask of steppable cells, computes the flat index of
+        the cell reached from every cell in every direction. Moves off the
+        board or onto a non-steppable cell leave the agent where it was.
+        """
+        index = np.arange(steppable.size).reshape(steppable.shape)
+        right, left, up, down = index.copy(), index.copy(), index.copy(), index.copy()
+
+        right[:, :-1] = np.where(steppable[:, 1:], index[:, 1:], index[:, :-1])
+        left[:, 1:] = np.where(steppable[:, :-1], index[:, :-1], index[:, 1:])
+        up[1:, :] = np.where(steppable[:-1, :], index[:-1, :], index[1:, :])
+        down[:-1, :] = np.where(steppable[1:, :], index[1:, :], index[:-1, :])
+
+        return {
+            Direction.RIGHT: right,
+            Direction.LEFT: left,
+            Direction.UP: up,
+            Direction.DOWN: down,
+        }
 
     def set_maze(self) -> None:
         """
@@ -163,23 +374,198 @@ class MazeBoard(MazeBase):
         """
 
         self.set_teleport()
+        self.__connect()
+
+    def __connect(self) -> None:
+        nodes = list(self.nodes)
+        steppable = np.array(
+            [self.nodes[node].is_steppable for node in nodes], dtype=bool
+        ).reshape(self.size)
+
+        neighbours = MazeBoard.neighbours(steppable)
+        directions = list(neighbours)
+        targets = zip(*(neighbours[d].ravel().tolist() for d in directions))
+        for node, node_targets in zip(nodes, targets):
+            self.connections[node] = {
+                direction: nodes[target]
+                for direction, target in zip(directions, node_targets)
+            }
+
+
+class SparseMazeGraph:
+    """
+    A random maze graph kept entirely in integer arrays, for graphs far too
+    large for MazeGraph's per-node objects.
+
+    Node i has kind kinds[i] and reward rewards[i]; teleports point to node
+    teleport_to[i]. Edges are stored in CSR form: the edges leaving node i are
+    indices[indptr[i]:indptr[i + 1]], followed in directions
+    edge_directions[indptr[i]:indptr[i + 1]]. As in MazeGraph, only regular
+    nodes get edges - between one and four, each to a uniformly chosen node.
+    """
+
+    @property
+    def size(self) -> int:
+        return len(self.__kinds)
+
+    @property
+    def kinds(self) -> np.ndarray:
+        return self.__kinds
+
+    @property
+    def rewards(self) -> np.ndarray:
+        return self.__rewards
+
+    @property
+    def teleport_to(self) -> np.ndarray:
+        return self.__teleport_to
+
+    @property
+    def indptr(self) -> np.ndarray:
+        return self.__indptr
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self.__indices
+
+    @property
+    def edge_directions(self) -> np.ndarray:
+        return self.__edge_directions
+
+    def __init__(
+        self,
+        size: int,
+        specs: list[tuple[float, Callable]],
+        seed: int | None = None,
+    ) -> None:
+        self.__rng: np.random.Generator = np.random.default_rng(seed)
+
+        # Every spec is instantiated once to learn its kind and reward.
+        prototypes = [call() for _, call in specs]
+        weights = np.array([weight for weight, _ in specs], dtype=np.float64)
+        drawn = self.__rng.choice(len(specs), size=size, p=weights / weights.sum())
+
+        self.__kinds: np.ndarray = np.array(
+            [cell.kind for cell in prototypes], dtype=np.int8
+        )[drawn]
+        self.__rewards: np.ndarray = np.array(
+            [
+                cell.reward if cell.kind != CellKind.TELEPORT else np.nan
+                for cell in prototypes
+            ],
+            dtype=np.float64,
+        )[drawn]
+        self.__teleport_to: np.ndarray = np.full(size, -1, dtype=np.int64)
+
+        self.set_teleport()
+        self.set_maze()
+
+    @classmethod
+    def from_layout(cls, layout: dict[str, np.ndarray]) -> "SparseMazeGraph":
+        """
+        Wraps the arrays of a layout without copying them, so memory-mapped
+        arrays stay memory-mapped.
+        """
+        graph = cls.__new__(cls)
+        graph.__rng = np.random.default_rng()
+        graph.__kinds = layout["kinds"]
+        graph.__rewards = layout["rewards"]
+        graph.__teleport_to = layout["teleport_to"]
+        graph.__indptr = layout["indptr"]
+        graph.__indices = layout["indices"]
+        graph.__edge_directions = layout["edge_directions"]
+        return graph
+
+    def layout(self) -> dict[str, np.ndarray]:
+        """
+        Same arrays as MazeBase.layout. Teleport rewards are stored resolved.
+        """
+        return {
+            "positions": np.arange(self.size)[:, None],
+            "kinds": self.__kinds,
+            "rewards": self.__rewards,
+            "teleport_to": self.__teleport_to,
+            "indptr": self.__indptr,
+            "indices": self.__indices,
+            "edge_directions": self.__edge_directions,
+        }
+
+    def set_teleport(self) -> None:
+        teleports = np.flatnonzero(self.__kinds == CellKind.TELEPORT)
+        valid = np.flatnonzero(
+            (self.__kinds != CellKind.TELEPORT) & (self.__kinds != CellKind.WALL)
+        )
+
+        self.__teleport_to[teleports] = valid[
+            self.__rng.integers(0, len(valid), size=len(teleports))
+        ]
+        self.__rewards[teleports] = self.__rewards[self.__teleport_to[teleports]]
 
-        for node in self.nodes:
-            for direction in Direction.get_all_directions():
-                match direction:
-                    case Direction.RIGHT:
-                        dc = self.__right(node)
-                    case Direction.LEFT:
-                        dc = self.__left(node)
-                    case Direction.UP:
-                        dc = self.__up(node)
-                    case Direction.DOWN:
-                        dc = self.__down(node)
-                    case _:
-                        raise Exception(
-                            f"No direction {direction} supported for this type of maze!"
-                        )
-
-                for dnode in self.nodes:
-                    if dnode == dc:
-                        self.connections[node][direction] = dnode
+    def set_maze(self) -> None:
+        no_directions = len(Direction.get_all_directions())
+        regular = np.flatnonzero(self.__kinds == CellKind.REGULAR)
+
+        # Draw between one and four directions with replacement per regular
+        # node, as MazeGraph does, and keep the distinct ones.
+        no_dirs = self.__rng.integers(1, no_directions + 1, size=len(regular))
+        drawn = self.__rng.integers(
+            0, no_directions, size=(len(regular), no_directions)
+        )
+        used = np.arange(no_directions) < no_dirs[:, None]
+        has_direction = np.zeros((len(regular), no_directions), dtype=bool)
+        rows = np.broadcast_to(np.arange(len(regular))[:, None], drawn.shape)
+        has_direction[rows[used], drawn[used]] = True
+
+        targets = self.__rng.integers(0, self.size, size=has_direction.shape)
+        counts = np.zeros(self.size, dtype=np.int64)
+        counts[regular] = has_direction.sum(axis=1)
+
+        self.__indptr: np.ndarray = np.concatenate(([0], np.cumsum(counts)))
+        self.__indices: np.ndarray = targets[has_direction]
+        self.__edge_directions: np.ndarray = np.nonzero(has_direction)[1].astype(
+            np.int8
+        )
+
+    def transitions(
+        self,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Same arrays as MazeBase.transitions, computed without per-node objects.
+        """
+        no_directions = len(Direction.get_all_directions())
+        steppable = (self.__kinds == CellKind.REGULAR) | (
+            self.__kinds == CellKind.TERMINAL
+        )
+        nodes = np.flatnonzero(steppable)
+        state_of = np.full(self.size, -1, dtype=np.int64)
+        state_of[nodes] = np.arange(len(nodes))
+
+        next_states = np.tile(np.arange(len(nodes))[:, None], (1, no_directions))
+        rewards = np.zeros((len(nodes), no_directions), dtype=np.float64)
+        valid = np.zeros((len(nodes), no_directions), dtype=bool)
+
+        sources = np.repeat(np.arange(self.size), np.diff(self.__indptr))
+        targets = self.__indices.copy()
+        edge_rewards = self.__rewards[targets]
+
+        # Walls bounce back with the reward of the current cell, self loops
+        # are bumps, teleports move on to their target.
+        walls = self.__kinds[targets] == CellKind.WALL
+        targets[walls] = sources[walls]
+        edge_rewards[walls] = self.__rewards[sources[walls]]
+        edge_rewards[~walls & (targets == sources)] = -11
+        teleports = self.__kinds[targets] == CellKind.TELEPORT
+        targets[teleports] = self.__teleport_to[targets[teleports]]
+
+        rows = state_of[sources]
+        next_states[rows, self.__edge_directions] = state_of[targets]
+        rewards[rows, self.__edge_directions] = edge_rewards
+        valid[rows, self.__edge_directions] = True
+
+        return (
+            nodes[:, None],
+            next_states,
+            rewards,
+            valid,
+            self.__kinds[nodes] == CellKind.TERMINAL,
+        )
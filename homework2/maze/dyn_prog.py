@@ -1,12 +1,22 @@
 from abc import ABC, abstractmethod
 from copy import deepcopy
+from heapq import heappop, heappush
 
+import numpy as np
 from alive_progress import alive_bar
+from scipy.sparse import csr_matrix, identity
+from scipy.sparse.linalg import bicgstab, spsolve
 
 from maze.utils import *
 from maze.env import MazeEnvironment
+from maze.mdp import CompiledMDP
+from maze.policy import CachedGreedyPolicy
 from maze.value_funcs import Q, V
 
+# Relative margin by which another action has to beat the current one for
+# policy iteration to switch to it.
+IMPROVEMENT_TOL = 1e-8
+
 
 class ValueIteration(ABC):
     @abstractmethod
@@ -42,7 +52,7 @@ class QIteration(ValueIteration):
             for iteration in range(iterations):
                 oq = deepcopy(self.q)
                 self.__update_values()
-                err = max([abs(self.q[s, a] - oq[s, a]) for s, a in self.q])
+                err = np.abs(self.q.values - oq.values).max()
 
                 if err < eps:
                     return iteration
@@ -86,7 +96,7 @@ class VIteration(ValueIteration):
             for iteration in range(iterations):
                 ov = deepcopy(self.v)
                 self.__update_values()
-                err = max([abs(self.v[s] - ov[s]) for s in self.v])
+                err = np.abs(self.v.values - ov.values).max()
 
                 if err < eps:
                     return iteration
@@ -94,3 +104,371 @@ class VIteration(ValueIteration):
                 bar()
 
         return iterations
+
+
+class VectorizedQIteration(ValueIteration):
+    """
+    Q iteration over the environment's compiled MDP. Every sweep is a single
+    batched Bellman backup into a second buffer, after which the buffers are
+    swapped. Results are written back into the usual Q object.
+    """
+
+    def __init__(self, env: MazeEnvironment, gamma: float = 1.0) -> None:
+        self.env = env
+        self.q = Q(env=env)
+        self.gamma = gamma
+
+    def run(self, eps: float = 0.1, iterations: int = 1000) -> int:
+        mdp = self.env.mdp
+
+        q = self.q.values.copy()
+        nq = q.copy()
+        iteration = iterations
+
+        print("Starting vectorized Q Iteration...")
+        with alive_bar(iterations) as bar:
+            for i in range(iterations):
+                mdp.backup(q.max(axis=1), self.gamma, out=nq)
+                nq[mdp.terminal] = q[mdp.terminal]
+                err = np.abs(nq - q).max()
+                q, nq = nq, q
+
+                if err < eps:
+                    iteration = i
+                    break
+
+                bar()
+
+        self.q.values = q
+
+        return iteration
+
+
+class VectorizedVIteration(ValueIteration):
+    """
+    V iteration over the environment's compiled MDP. Every sweep is a single
+    batched Bellman backup followed by a max over actions, written into a
+    second buffer. Results are written back into the usual V object.
+    """
+
+    def __init__(self, env: MazeEnvironment, gamma: float = 1.0):
+        self.env = env
+        self.v = V(env=env)
+        self.gamma = gamma
+
+    def run(self, eps: float = 0.1, iterations: int = 1000) -> int:
+        mdp = self.env.mdp
+
+        v = self.v.values.copy()
+        nv = v.copy()
+        q = np.empty(mdp.shape[:2])
+        iteration = iterations
+
+        print("Starting vectorized V iteration...")
+        with alive_bar(iterations) as bar:
+            for i in range(iterations):
+                mdp.backup(v, self.gamma, out=q)
+                q.max(axis=1, out=nv)
+                nv[mdp.terminal] = v[mdp.terminal]
+                err = np.abs(nv - v).max()
+                v, nv = nv, v
+
+                if err < eps:
+                    iteration = i
+                    break
+
+                bar()
+
+        self.v.values = v
+
+        return iteration
+
+
+class GaussSeidelVIteration(ValueIteration):
+    """
+    In-place V iteration over the compiled MDP: every backup immediately sees
+    the values updated earlier in the same sweep.
+    """
+
+    def __init__(self, env: MazeEnvironment, gamma: float = 1.0):
+        self.env = env
+        self.v = V(env=env)
+        self.gamma = gamma
+        self.backups = 0
+
+    def run(self, eps: float = 0.1, iterations: int = 1000) -> int:
+        mdp = self.env.mdp
+        p, r, n = mdp.probabilities, mdp.rewards, mdp.next_states
+
+        v = self.v.values.copy()
+        order = np.flatnonzero(~mdp.terminal).tolist()
+        iteration = iterations
+        self.backups = 0
+
+        print("Starting Gauss-Seidel V iteration...")
+        with alive_bar(iterations) as bar:
+            for i in range(iterations):
+                err = 0.0
+                for s in order:
+                    value = (p[s] @ (r[s] + self.gamma * v[n[s]])).max()
+                    err = max(err, abs(value - v[s]))
+                    v[s] = value
+                self.backups += len(order)
+
+                if err < eps:
+                    iteration = i
+                    break
+
+                bar()
+
+        self.v.values = v
+
+        return iteration
+
+
+class PrioritizedSweepingVIteration(ValueIteration):
+    """
+    V iteration that backs up one state at a time, always the one with the
+    largest Bellman error. After a backup, only the predecessors of the
+    updated state are re-examined and queued if their error exceeds eps.
+    """
+
+    def __init__(self, env: MazeEnvironment, gamma: float = 1.0):
+        self.env = env
+        self.v = V(env=env)
+        self.gamma = gamma
+        self.backups = 0
+
+    def run(self, eps: float = 0.1, iterations: int = 1000) -> int:
+        """
+        Stops once no state has a Bellman error of at least eps, or after
+        `iterations` sweeps' worth of backups. Like the other solvers, returns
+        a number of sweeps: the backups taken, in full sweeps over the
+        non-terminal states. The backups themselves are counted in `backups`.
+        """
+        mdp = self.env.mdp
+        p, r, n = mdp.probabilities, mdp.rewards, mdp.next_states
+        predecessors = mdp.predecessors()
+
+        v = self.v.values.copy()
+        errors = np.abs(mdp.backup(v, self.gamma).max(axis=1) - v)
+        errors[mdp.terminal] = 0.0
+
+        queue = [(-e, s) for s, e in enumerate(errors.tolist()) if e >= eps]
+        queue.sort()
+        no_updated = max(int((~mdp.terminal).sum()), 1)
+        max_backups = iterations * no_updated
+        self.backups = 0
+
+        print("Starting prioritized sweeping V iteration...")
+        while queue and self.backups < max_backups:
+            error, s = heappop(queue)
+            if -error != errors[s]:
+                continue
+
+            v[s] = (p[s] @ (r[s] + self.gamma * v[n[s]])).max()
+            errors[s] = 0.0
+            self.backups += 1
+
+            start, end = predecessors.indptr[s], predecessors.indptr[s + 1]
+            for ps in predecessors.indices[start:end].tolist():
+                if mdp.terminal[ps]:
+                    continue
+
+                error = abs((p[ps] @ (r[ps] + self.gamma * v[n[ps]])).max() - v[ps])
+                if error >= eps:
+                    errors[ps] = error
+                    heappush(queue, (-error, ps))
+
+        self.v.values = v
+
+        return self.backups // no_updated
+
+
+class IncrementalVIteration(VectorizedVIteration):
+    """
+    Vectorized V iteration that can follow edits of the maze. After the base
+    is edited and env.update() recompiled the environment, the next run
+    warm-starts from the previous values, mapped onto the new states by
+    position, and only backs up the states whose transitions changed and
+    their predecessors. From there on, every sweep backs up just the
+    predecessors of the states whose value moved by at least eps.
+    """
+
+    def __init__(self, env: MazeEnvironment, gamma: float = 1.0):
+        super().__init__(env, gamma)
+        self.backups = 0
+        self.__solved: CompiledMDP | None = None
+
+    def run(self, eps: float = 0.1, iterations: int = 1000) -> int:
+        mdp = self.env.mdp
+        if self.__solved is None:
+            iteration = super().run(eps, iterations)
+            self.backups = (iteration + 1) * mdp.shape[0]
+            self.__solved = mdp
+            return iteration
+
+        p, r, n = mdp.probabilities, mdp.rewards, mdp.next_states
+        previous = CompiledMDP.match(mdp.positions, self.__solved.positions)
+        changed = np.flatnonzero(mdp.changed(self.__solved, previous))
+        predecessors = mdp.predecessors()
+
+        # A changed state that became terminal is never backed up itself, yet
+        # its value was reset, so its predecessors have to be seeded directly.
+        active = np.union1d(changed, predecessors[changed].indices)
+
+        v = np.where(previous >= 0, self.v.values[previous.clip(min=0)], 0.0)
+        v[mdp.terminal] = 0.0
+        iteration = iterations
+        self.backups = 0
+
+        print("Starting incremental V iteration...")
+        with alive_bar(iterations) as bar:
+            for i in range(iterations):
+                active = active[~mdp.terminal[active]]
+                if not len(active):
+                    iteration = i
+                    break
+
+                returns = r[active] + self.gamma * v[n[active]]
+                values = np.einsum("sad,sd->sa", p[active], returns).max(axis=1)
+                moved = active[np.abs(values - v[active]) >= eps]
+                v[active] = values
+                self.backups += len(active)
+
+                active = np.unique(predecessors[moved].indices)
+
+                bar()
+
+        self.v = V(env=self.env, values=v)
+        self.__solved = mdp
+
+        return iteration
+
+
+class PolicyIteration(ValueIteration):
+    """
+    Policy iteration over the compiled MDP. Every policy pi is evaluated
+    exactly by solving (I - gamma * P_pi) v = r_pi - with a sparse direct
+    solver on boards of up to `direct_limit` states and with BiCGSTAB down to
+    a relative residual of `tol`, warm started from the previous values, on
+    larger ones - and then improved greedily through a CachedGreedyPolicy. A
+    state only switches to the greedy action if it is strictly better, by a
+    margin relative to the values, so tied actions cannot make the policy
+    cycle.
+
+    For gamma = 1 the system is only solvable if the policy reaches a
+    terminal state from every state, so iteration starts from such a policy.
+    A policy that does not, and thus a singular system, raises a ValueError.
+    """
+
+    def __init__(
+        self,
+        env: MazeEnvironment,
+        gamma: float = 1.0,
+        direct_limit: int = 10000,
+        tol: float = 1e-10,
+    ):
+        self.env = env
+        self.v = V(env=env)
+        self.gamma = gamma
+        self.direct_limit = direct_limit
+        self.tol = tol
+
+        # Index into env.actions of the current action of every state.
+        self.pi: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.__greedy = CachedGreedyPolicy()
+
+    def __proper_policy(self) -> np.ndarray:
+        """
+        A policy reaching a terminal state with probability 1 from every
+        state: working backwards from the terminal states, every state picks
+        an action that may lead to a state already covered.
+        """
+        mdp = self.env.mdp
+        reaches = mdp.valid[:, None, :] & (mdp.probabilities > 0.0)
+        predecessors = mdp.predecessors()
+
+        pi = np.zeros(mdp.shape[0], dtype=np.int64)
+        covered = mdp.terminal.copy()
+        frontier = np.flatnonzero(covered)
+        while len(frontier):
+            frontier = np.unique(predecessors[frontier].indices)
+            frontier = frontier[~covered[frontier]]
+
+            hits = reaches[frontier] & covered[mdp.next_states[frontier]][:, None, :]
+            pi[frontier] = np.argmax(hits.any(axis=2), axis=1)
+            covered[frontier] = True
+
+        if not covered.all():
+            raise ValueError("Some states cannot reach a terminal state!")
+
+        return pi
+
+    def __evaluate(
+        self, p: csr_matrix, r: np.ndarray, pi: np.ndarray, v: np.ndarray
+    ) -> np.ndarray:
+        mdp = self.env.mdp
+        no_states, no_actions, _ = mdp.shape
+        rows = np.arange(no_states) * no_actions + pi
+
+        # Terminal states keep their value: their rows reduce to v(s) = v(s).
+        r_pi = r[rows]
+        r_pi[mdp.terminal] = v[mdp.terminal]
+
+        a = (identity(no_states, format="csr") - self.gamma * p[rows]).tocsc()
+        solution, info = None, -1
+        if no_states > self.direct_limit:
+            solution, info = bicgstab(a, r_pi, x0=v, rtol=self.tol, atol=0.0)
+        if info != 0:
+            solution = spsolve(a, r_pi)
+
+        if not np.isfinite(solution).all():
+            raise ValueError("The policy does not reach a terminal state!")
+
+        return solution
+
+    def run(self, eps: float = 0.1, iterations: int = 1000) -> int:
+        """
+        Stops once no state can improve its action. eps is unused, policies
+        are evaluated to `tol`.
+        """
+        mdp = self.env.mdp
+        no_states, no_actions, _ = mdp.shape
+        states = np.arange(no_states)
+
+        keep = np.repeat(~mdp.terminal, no_actions)[:, None]
+        p = mdp.transition_matrix().multiply(keep).tocsr()
+        r = mdp.expected_rewards().ravel()
+
+        v = self.v.values.copy()
+        if len(self.pi) == no_states:
+            pi = self.pi
+        elif self.gamma == 1.0:
+            pi = self.__proper_policy()
+        else:
+            pi = self.__greedy.table(self.env, self.v, self.gamma).copy()
+
+        print("Starting policy iteration...")
+        with alive_bar(iterations) as bar:
+            for iteration in range(iterations):
+                v = self.__evaluate(p, r, pi, v)
+                self.v.values = v
+                self.pi = pi
+
+                q = self.__greedy.action_values(self.env, self.v, self.gamma)
+                current = q[states, pi]
+                best = self.__greedy.table(self.env, self.v, self.gamma)
+                better = q[states, best] - current > IMPROVEMENT_TOL * (
+                    1.0 + np.abs(current)
+                )
+                better &= ~mdp.terminal
+
+                if not better.any():
+                    return iteration
+
+                pi = np.where(better, best, pi)
+
+                bar()
+
+        return iterations
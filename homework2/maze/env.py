@@ -1,10 +1,11 @@
-from random import choice
 from typing import Any
 
+import numpy as np
 from numpy import round, ones
-from numpy.random import dirichlet
+from numpy.random import dirichlet, random
 
-from maze.base import MazeBase
+from maze.base import MazeBase, SparseMazeGraph
+from maze.mdp import CompiledMDP
 from maze.utils import *
 
 Probabilities = dict[tuple[State, Action], dict[Direction, float]]
@@ -24,7 +25,7 @@ class MazeEnvironment:
     """
 
     @property
-    def base(self) -> MazeBase:
+    def base(self) -> MazeBase | SparseMazeGraph:
         return self.__base
 
     @property
@@ -33,7 +34,7 @@ class MazeEnvironment:
 
     @property
     def states(self) -> list[State]:
-        return self.__states
+        return self.__mdp.states
 
     @property
     def actions(self) -> list[Action]:
@@ -41,32 +42,51 @@ class MazeEnvironment:
 
     @property
     def probabilities(self) -> Probabilities:
+        """
+        Dict view of the compiled probabilities, built on first access.
+        """
+        if self.__probabilities is None:
+            self.__probabilities = self.__probabilities_view()
         return self.__probabilities
 
+    @property
+    def mdp(self) -> CompiledMDP:
+        return self.__mdp
+
+    @property
+    def dirty(self) -> np.ndarray:
+        """
+        Indices of the states whose transitions changed in the last update.
+        """
+        return self.__dirty
+
+    @property
+    def index(self) -> dict[State, int]:
+        """
+        Dense integer index of every state, in the order of `states`.
+        """
+        return self.__mdp.index
+
     def __init__(
         self,
-        base: MazeBase,
+        base: MazeBase | SparseMazeGraph,
         env_type: EnvType = EnvType.STOCHASTIC,
+        mdp: CompiledMDP | None = None,
     ) -> None:
         """
         Initializer for the environment by specifying the underlying
-        maze base.
+        maze base. An already compiled mdp of that base (e.g. a loaded
+        snapshot) can be passed in to skip compilation.
         """
 
         self.__base = base
         self.__type = env_type
 
-        self.__states: list[State] = [
-            node
-            for node in self.base
-            if self.base[node].is_steppable
-            and not isinstance(self.__base[node], TeleportCell)
-        ]
-
         self.__actions: list[Action] = Action.get_all_actions()
 
-        self.__probabilities: Probabilities = {}
-        self.__generate_probabilities()
+        self.__probabilities: Probabilities | None = None
+        self.__mdp: CompiledMDP = self.__compile() if mdp is None else mdp
+        self.__dirty: np.ndarray = np.zeros(0, dtype=np.int64)
 
     def __call__(self, state: State, action: Action) -> list[dict[str, Any]]:
         """
@@ -75,77 +95,119 @@ class MazeEnvironment:
         """
         mdp = list()
 
-        for direction in self.__base.get_directions(state):
-            next_state = self.__base.get_from(state, direction)
-
-            if isinstance(self.__base.nodes[next_state], WallCell):
-                next_state = state
-                new_cell = self.__base[next_state]
-                reward = new_cell.reward
-            elif next_state == state:
-                new_cell = self.__base[next_state]
-                reward = -11
-            else:
-                new_cell = self.__base[next_state]
-                reward = new_cell.reward
-
-            if isinstance(new_cell, TeleportCell):
-                next_state = self.__base.find_position(new_cell.teleport_to)
-                new_cell = new_cell.teleport_to
+        directions = Direction.get_all_directions()
+        s = self.__mdp.index[state]
+        a = self.__actions.index(action)
 
+        for d in np.flatnonzero(self.__mdp.valid[s]):
+            next_state = self.__mdp.next_states[s, d]
             mdp.append(
                 {
-                    "direction": direction,
-                    "next_state": next_state,
-                    "reward": reward,
-                    "probability": self.__probabilities[state, action][direction],
-                    "is_terminal": new_cell.is_terminal,
+                    "direction": directions[d],
+                    "next_state": self.states[next_state],
+                    "reward": self.__mdp.rewards[s, d].item(),
+                    "probability": self.__mdp.probabilities[s, a, d].item(),
+                    "is_terminal": self.__mdp.terminal[next_state].item(),
                 }
             )
 
         return mdp
 
-    def __generate_probabilities(self):
-        for s in self.__states:
-            directions = self.__base.get_directions(s)
-
-            match self.__type:
-                case EnvType.DETERMINISTIC:
-                    for a in self.__actions:
-                        self.__probabilities[s, a] = {}
-
-                        found_direction = False
-
-                        for d in directions:
-                            if d == ad_map[a]:
-                                self.__probabilities[s, a][d] = 1.0
-                                found_direction = True
-                            else:
-                                self.__probabilities[s, a][d] = 0.0
-
-                        # What can happen with graphs is that no direction with possible action
-                        # in ad_map can be found, so we "cheat" by adding our action to a random
-                        # direction. If user doesn't want this to happen, comment out the rest of
-                        # the code.
-                        if not found_direction and len(directions):
-                            self.__probabilities[s, a][choice(directions)] = 1.0
-
-                case EnvType.STOCHASTIC:
-                    for a in self.__actions:
-                        self.__probabilities[s, a] = {}
-
-                        if len(directions):
-                            gen = round(
-                                dirichlet(ones(len(directions)), size=1)[0], 3
-                            ).tolist()
-                        else:
-                            gen = [0.0 for _ in Direction.get_all_directions()]
-
-                        for d in Direction.get_all_directions():
-                            if d in directions:
-                                self.__probabilities[s, a][d] = gen.pop(0)
-                            else:
-                                self.__probabilities[s, a][d] = 0.0
+    def __compile(self) -> CompiledMDP:
+        """
+        Compiles the base's transitions and adds the probabilities of
+        following every direction under every action.
+        """
+        positions, next_states, rewards, valid, terminal = self.__base.transitions()
+        probabilities = self.__generate_probabilities(valid)
+        return CompiledMDP(
+            positions, next_states, rewards, probabilities, terminal, valid
+        )
+
+    def update(self) -> np.ndarray:
+        """
+        Recompiles the environment after the base was edited. States whose
+        available directions did not change keep their probabilities, so
+        only the edited region of the MDP differs. Returns the indices of
+        the states whose transitions changed, also kept in `dirty`.
+
+        Value functions built for the environment before the update still
+        refer to the old states.
+        """
+        positions, next_states, rewards, valid, terminal = self.__base.transitions()
+        old = self.__mdp
+
+        previous = CompiledMDP.match(positions, old.positions)
+        kept = previous >= 0
+        kept[kept] = (valid[kept] == old.valid[previous[kept]]).all(axis=1)
+
+        probabilities = np.zeros((len(valid), len(self.__actions), valid.shape[1]))
+        probabilities[kept] = old.probabilities[previous[kept]]
+        probabilities[~kept] = self.__generate_probabilities(valid[~kept])
+
+        self.__mdp = CompiledMDP(
+            positions, next_states, rewards, probabilities, terminal, valid
+        )
+        self.__probabilities = None
+        self.__dirty = np.flatnonzero(self.__mdp.changed(old, previous))
+
+        return self.__dirty
+
+    def __generate_probabilities(self, valid: np.ndarray) -> np.ndarray:
+        """
+        Builds the dense (states, actions, directions) probability array.
+        """
+        no_states, no_directions = valid.shape
+        no_actions = len(self.__actions)
+        probabilities = np.zeros((no_states, no_actions, no_directions))
+
+        match self.__type:
+            case EnvType.DETERMINISTIC:
+                directions = Direction.get_all_directions()
+                mapped = np.array([directions.index(ad_map[a]) for a in self.__actions])
+                found = valid[:, mapped]
+                probabilities[:, np.arange(no_actions), mapped] = found
+
+                # What can happen with graphs is that no direction with possible action
+                # in ad_map can be found, so we "cheat" by adding our action to a random
+                # direction. If user doesn't want this to happen, comment out the rest of
+                # the code.
+                s, a = np.nonzero(~found & valid.any(axis=1, keepdims=True))
+                keys = np.where(valid[s], random((len(s), no_directions)), -1.0)
+                probabilities[s, a, keys.argmax(axis=1)] = 1.0
+
+            case EnvType.STOCHASTIC:
+                # One Dirichlet draw per group of states sharing an out-degree,
+                # scattered onto each state's available directions in order.
+                degrees = valid.sum(axis=1)
+                for degree in np.unique(degrees[degrees > 0]).tolist():
+                    group = np.flatnonzero(degrees == degree)
+                    gen = round(
+                        dirichlet(ones(degree), size=(len(group), no_actions)), 3
+                    )
+                    block = np.zeros((len(group), no_actions, no_directions))
+                    block[np.broadcast_to(valid[group][:, None, :], block.shape)] = (
+                        gen.ravel()
+                    )
+                    probabilities[group] = block
+
+        return probabilities
+
+    def __probabilities_view(self) -> Probabilities:
+        directions = Direction.get_all_directions()
+        probabilities: Probabilities = {}
+
+        for i, s in enumerate(self.states):
+            valid = self.__mdp.valid[i].tolist()
+            for j, a in enumerate(self.__actions):
+                row = self.__mdp.probabilities[i, j].tolist()
+                probabilities[s, a] = {
+                    d: p
+                    for d, p, v in zip(directions, row, valid)
+                    if v or self.__type == EnvType.STOCHASTIC
+                }
+
+        return probabilities
 
     def is_terminal(self, s: State) -> bool:
-        return self.__base[s].is_terminal
+        return self.__mdp.terminal[self.index[s]].item()
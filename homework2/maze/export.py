@@ -0,0 +1,187 @@
+import json
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+from tabulate import tabulate
+
+from maze.env import MazeEnvironment
+from maze.mdp import CompiledMDP
+from maze.utils import *
+
+COLUMNS = {
+    "state": np.int64,
+    "action": np.int8,
+    "direction": np.int8,
+    "next_state": np.int64,
+    "reward": np.float64,
+    "probability": np.float64,
+}
+
+
+def transition_columns(
+    mdp: CompiledMDP, start: int, stop: int
+) -> dict[str, np.ndarray]:
+    """
+    Transition table rows of states start..stop as columns: one row per state,
+    action and direction available in the state, in that order.
+    """
+    no_actions = mdp.shape[1]
+    valid = mdp.valid[start:stop]
+    _, d = np.nonzero(valid)
+    counts = valid.sum(axis=1)
+    offsets = np.cumsum(counts) - counts
+
+    # Every action of a state repeats the state's valid directions.
+    local = np.repeat(np.arange(stop - start), no_actions)
+    actions = np.tile(np.arange(no_actions), stop - start)
+    group_counts = counts[local]
+    group_starts = np.cumsum(group_counts) - group_counts
+
+    within = np.arange(group_counts.sum()) - np.repeat(group_starts, group_counts)
+    directions = d[np.repeat(offsets[local], group_counts) + within]
+    states = start + np.repeat(local, group_counts)
+    actions = np.repeat(actions, group_counts)
+
+    return {
+        "state": states,
+        "action": actions,
+        "direction": directions,
+        "next_state": mdp.next_states[states, directions],
+        "reward": mdp.rewards[states, directions],
+        "probability": mdp.probabilities[states, actions, directions],
+    }
+
+
+def transition_rows(
+    positions: np.ndarray, columns: dict[str, np.ndarray]
+) -> Iterator[dict[str, Any]]:
+    """
+    Rows of the columns in the layout of Info.log_probabilities.
+    """
+    actions = Action.get_all_actions()
+    directions = Direction.get_all_directions()
+    states = [State(p) for p in positions[columns["state"]].tolist()]
+    next_states = [State(p) for p in positions[columns["next_state"]].tolist()]
+
+    for s, a, d, ns, r, p in zip(
+        states,
+        columns["action"].tolist(),
+        columns["direction"].tolist(),
+        next_states,
+        columns["reward"].tolist(),
+        columns["probability"].tolist(),
+    ):
+        yield {
+            "State": s,
+            "Action": actions[a],
+            "Direction": directions[d],
+            "Next state": ns,
+            "Reward": r,
+            "Probability(s+, r | s, a)": p,
+        }
+
+
+class TransitionExport:
+    """
+    Columnar, on-disk transition table of an environment.
+
+    The table is written a block of states at a time, one raw binary file per
+    column, so memory stays bounded by the block size however large the
+    environment is. Reading memory-maps the columns back; the text table of
+    Info.log_probabilities is available as a view over them.
+    """
+
+    @property
+    def path(self) -> Path:
+        return self.__path
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.__positions
+
+    @property
+    def columns(self) -> dict[str, np.ndarray]:
+        return self.__columns
+
+    def __init__(self, path: str | Path) -> None:
+        self.__path: Path = Path(path)
+        meta = json.loads((self.__path / "meta.json").read_text())
+
+        self.__len: int = meta["rows"]
+        self.__positions: np.ndarray = np.load(
+            self.__path / "positions.npy", mmap_mode="r"
+        )
+        self.__columns: dict[str, np.ndarray] = {
+            name: (
+                np.memmap(self.__path / f"{name}.bin", dtype=dtype, mode="r")
+                if self.__len
+                else np.zeros(0, dtype=dtype)
+            )
+            for name, dtype in COLUMNS.items()
+        }
+
+    def __len__(self) -> int:
+        return self.__len
+
+    @staticmethod
+    def write(
+        env: MazeEnvironment, path: str | Path, chunk: int = 65536
+    ) -> "TransitionExport":
+        """
+        Streams the transitions of env to path, chunk states at a time.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        mdp = env.mdp
+        np.save(path / "positions.npy", mdp.positions)
+
+        rows = 0
+        files = {name: open(path / f"{name}.bin", "wb") for name in COLUMNS}
+        try:
+            for start in range(0, mdp.shape[0], chunk):
+                block = transition_columns(mdp, start, min(start + chunk, mdp.shape[0]))
+                for name, dtype in COLUMNS.items():
+                    block[name].astype(dtype, copy=False).tofile(files[name])
+                rows += len(block["state"])
+        finally:
+            for file in files.values():
+                file.close()
+
+        meta = {
+            "rows": rows,
+            "columns": {k: np.dtype(v).name for k, v in COLUMNS.items()},
+        }
+        (path / "meta.json").write_text(json.dumps(meta, indent=4))
+
+        return TransitionExport(path)
+
+    def rows(
+        self, start: int = 0, stop: int | None = None, chunk: int = 65536
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Rows start..stop of the table, converted chunk rows at a time.
+        """
+        stop = self.__len if stop is None else min(stop, self.__len)
+        for begin in range(start, stop, chunk):
+            end = min(begin + chunk, stop)
+            yield from transition_rows(
+                self.__positions,
+                {name: column[begin:end] for name, column in self.__columns.items()},
+            )
+
+    def write_csv(self, path: str | Path, chunk: int = 65536) -> None:
+        with open(path, "w") as f:
+            f.write(",".join(COLUMNS) + "\n")
+            for begin in range(0, self.__len, chunk):
+                block = np.column_stack(
+                    [
+                        column[begin : begin + chunk]
+                        for column in self.__columns.values()
+                    ]
+                )
+                np.savetxt(f, block, fmt=["%d"] * 4 + ["%.17g"] * 2, delimiter=",")
+
+    def to_rst(self) -> str:
+        return tabulate(list(self.rows()), "keys", "rst")
@@ -3,39 +3,76 @@ import os
 import matplotlib.pyplot as plt
 import networkx as nx
 from colormap import rgb2hex
-from numpy import ones, uint8
+import numpy as np
 from tabulate import tabulate
 
 from maze.base import MazeGraph, MazeBoard, MazeBase
 from maze.env import MazeEnvironment
+from maze.export import TransitionExport, transition_columns, transition_rows
 from maze.value_funcs import V, Q
-from maze.policy import Policy
+from maze.policy import Policy, GreedyPolicy, CachedGreedyPolicy
 from maze.utils import *
 
+# Colors of the cells by CellKind, and of regular cells with a penalty reward
+CELL_COLORS = np.array(
+    [
+        RegularCell(-1).color,
+        TerminalCell(-1).color,
+        TeleportCell().color,
+        WallCell(-1).color,
+    ],
+    dtype=np.uint8,
+)
+PENALTY_COLOR = RegularCell(-10).color
+
+# Boards with more cells than this are drawn without per-cell text
+ANNOTATION_LIMIT = 32 * 32
+
+# (column, row) offset of the arrow drawn for every direction
+DIRECTION_ARROWS = {
+    Direction.RIGHT: (1, 0),
+    Direction.LEFT: (-1, 0),
+    Direction.UP: (0, -1),
+    Direction.DOWN: (0, 1),
+}
+
 
 class Info:
+    @staticmethod
+    def __board_grid(board: MazeBoard, positions, values, fill=np.nan):
+        grid = np.full((board.rows_no, board.cols_no), fill, dtype=np.float64)
+        grid[positions[:, 0], positions[:, 1]] = values
+        return grid
+
     @staticmethod
     def __draw_board(board: MazeBoard, ax):
-        board_img = ones(shape=(board.rows_no, board.cols_no, 3), dtype=uint8)
+        cells = board.nodes.values()
+        kinds = np.fromiter((cell.kind for cell in cells), np.int8, len(cells))
+        penalties = np.fromiter(
+            (cell.kind == CellKind.REGULAR and cell.reward != -1 for cell in cells),
+            bool,
+            len(cells),
+        )
 
-        for i in range(board.rows_no):
-            for j in range(board.cols_no):
-                board_img[i, j, :] = board[i, j].color
-                if isinstance(board[i, j], TeleportCell):
-                    ax.text(
-                        j - 0.4,
-                        i + 0.1,
-                        f"({board.find_position(board[i, j].teleport_to)[0]},"
-                        f"{board.find_position(board[i, j].teleport_to)[1]})",
-                    )
+        colors = CELL_COLORS[kinds]
+        colors[penalties] = PENALTY_COLOR
+        ax.imshow(colors.reshape(board.rows_no, board.cols_no, 3))
 
-        ax.imshow(board_img)
+        if board.rows_no * board.cols_no <= ANNOTATION_LIMIT:
+            positions = {id(cell): s for s, cell in board.nodes.items()}
+            for s, cell in board.nodes.items():
+                if isinstance(cell, TeleportCell):
+                    target = positions[id(cell.teleport_to)]
+                    ax.text(s[1] - 0.4, s[0] + 0.1, f"({target[0]},{target[1]})")
 
     @staticmethod
-    def __draw_board_values(env: MazeEnvironment, values: dict[State, float], ax):
+    def __draw_board_values(env: MazeEnvironment, vf: V | Q, ax):
         Info.__draw_board(env.base, ax=ax)
-        for s in env.states:
-            ax.text(s[1] - 0.4, s[0] + 0.1, f"{values[s]:.1f}")
+        values = vf.values if isinstance(vf, V) else vf.values.max(axis=1)
+        grid = Info.__board_grid(env.base, env.mdp.positions, values)
+
+        image = ax.imshow(grid, cmap="viridis", alpha=0.85)
+        plt.colorbar(image, ax=ax)
 
     @staticmethod
     def __draw_board_policy(
@@ -46,28 +83,53 @@ class Info:
         ax,
     ):
         Info.__draw_board(env.base, ax=ax)
-        for s in env.states:
-            if not env.base[s].is_terminal:
-                a = policy.act(s, env, values, gamma)
-                match env.type:
-                    case EnvType.STOCHASTIC:
-                        if a == Action.ACTION_A1:
-                            ax.text(s[1] - 0.25, s[0] + 0.1, "A1")
-                        elif a == Action.ACTION_A2:
-                            ax.text(s[1] - 0.25, s[0] + 0.1, "A2")
-                        elif a == Action.ACTION_A3:
-                            ax.text(s[1] - 0.25, s[0] + 0.1, "A3")
-                        else:
-                            ax.text(s[1] - 0.25, s[0] + 0.1, "A4")
-                    case EnvType.DETERMINISTIC:
-                        if ad_map[a] == Direction.RIGHT:
-                            ax.text(s[1] - 0.25, s[0] + 0.1, "→")
-                        elif ad_map[a] == Direction.LEFT:
-                            ax.text(s[1] - 0.25, s[0] + 0.1, "←")
-                        elif ad_map[a] == Direction.UP:
-                            ax.text(s[1] - 0.25, s[0] + 0.1, "↑")
-                        else:
-                            ax.text(s[1] - 0.25, s[0] + 0.1, "↓")
+        actions = Info.__policy_table(env, values, policy, gamma)
+        acting = ~env.mdp.terminal
+        positions = env.mdp.positions[acting]
+
+        match env.type:
+            case EnvType.STOCHASTIC:
+                grid = Info.__board_grid(env.base, positions, actions[acting])
+                cmap = plt.get_cmap("tab10", len(env.actions))
+                image = ax.imshow(
+                    grid, cmap=cmap, vmin=-0.5, vmax=len(env.actions) - 0.5, alpha=0.6
+                )
+                bar = plt.colorbar(image, ax=ax, ticks=range(len(env.actions)))
+                bar.ax.set_yticklabels([f"A{i + 1}" for i in range(len(env.actions))])
+            case EnvType.DETERMINISTIC:
+                arrows = np.array([DIRECTION_ARROWS[ad_map[a]] for a in env.actions])
+                u, v = arrows[actions[acting]].T
+                ax.quiver(
+                    positions[:, 1],
+                    positions[:, 0],
+                    u,
+                    v,
+                    angles="xy",
+                    scale_units="xy",
+                    scale=1.5,
+                    pivot="middle",
+                )
+
+    @staticmethod
+    def __policy_table(
+        env: MazeEnvironment, vf: V | Q, policy: Policy, gamma: float
+    ) -> np.ndarray:
+        """
+        Index into env.actions of the action taken in every state. Greedy
+        policies are evaluated for all states at once.
+        """
+        if isinstance(policy, CachedGreedyPolicy):
+            return policy.table(env, vf, gamma)
+        if isinstance(policy, GreedyPolicy):
+            return CachedGreedyPolicy().table(env, vf, gamma)
+
+        actions = {a: j for j, a in enumerate(env.actions)}
+        return np.array(
+            [
+                0 if terminal else actions[policy.act(s, env, vf, gamma)]
+                for s, terminal in zip(env.states, env.mdp.terminal.tolist())
+            ]
+        )
 
     @staticmethod
     def __draw_graph(graph: MazeGraph, ax, labels: dict[State, str] | None = None):
@@ -142,25 +204,22 @@ class Info:
         gamma: float,
         ax,
     ):
-        labels = {}
-
-        for s in env.states:
-            if not env.base[s].is_terminal:
-                a = policy.act(s, env, vf, gamma)
-                if a == Action.ACTION_A1:
-                    labels[s] = "A1"
-                elif a == Action.ACTION_A2:
-                    labels[s] = "A2"
-                elif a == Action.ACTION_A3:
-                    labels[s] = "A3"
-                else:
-                    labels[s] = "A4"
+        actions = Info.__policy_table(env, vf, policy, gamma)
+        names = [a.name.removeprefix("ACTION_") for a in env.actions]
+
+        labels = {
+            s: names[j]
+            for s, j, terminal in zip(
+                env.states, actions.tolist(), env.mdp.terminal.tolist()
+            )
+            if not terminal
+        }
 
         Info.__draw_graph(env.base, ax, labels=labels)
 
     @staticmethod
     def draw_base(base: MazeBase, ax=None):
-        ax = ax if ax else plt
+        ax = ax if ax else plt.gca()
         if isinstance(base, MazeBoard):
             Info.__draw_board(base, ax=ax)
         elif isinstance(base, MazeGraph):
@@ -168,12 +227,11 @@ class Info:
 
     @staticmethod
     def draw_values(env: MazeEnvironment, vf: V | Q, ax=None):
-        ax = ax if ax else plt
-        v: dict[State, float] = vf.v_table
+        ax = ax if ax else plt.gca()
         if isinstance(env.base, MazeBoard):
-            Info.__draw_board_values(env, v, ax)
+            Info.__draw_board_values(env, vf, ax)
         elif isinstance(env.base, MazeGraph):
-            Info.__draw_graph_values(env, v, ax)
+            Info.__draw_graph_values(env, vf.v_table, ax)
 
     @staticmethod
     def draw_policy(
@@ -183,41 +241,45 @@ class Info:
         gamma: float,
         ax=None,
     ):
-        ax = ax if ax else plt
+        ax = ax if ax else plt.gca()
         if isinstance(env.base, MazeBoard):
             Info.__draw_board_policy(env, vf, policy, gamma, ax)
         elif isinstance(env.base, MazeGraph):
             Info.__draw_graph_policy(env, vf, policy, gamma, ax)
 
     @staticmethod
-    def log_probabilities(env: MazeEnvironment, nof: str):
-        if not os.path.exists("logs"):
-            os.mkdir("logs")
-
-        to_log = list()
-        for s, a in env.probabilities:
-            mdp = env(s, a)
-            for value in mdp:
-                to_log.append(
-                    {
-                        "State": s,
-                        "Action": a,
-                        "Direction": value["direction"],
-                        "Next state": value["next_state"],
-                        "Reward": value["reward"],
-                        "Probability(s+, r | s, a)": env.probabilities[s, a][
-                            value["direction"]
-                        ],
-                    }
-                )
+    def log_probabilities(env: MazeEnvironment, nof: str, directory: str = "logs"):
+        """
+        Text view of the transition table. For large environments prefer
+        export_probabilities, which streams the table to disk.
+        """
+        if not os.path.exists(directory):
+            os.mkdir(directory)
 
-        with open(f"./logs/probabilities_{nof}.txt", "w") as p:
-            p.write(tabulate(to_log, "keys", "rst"))
+        mdp = env.mdp
+        to_log = transition_rows(
+            mdp.positions, transition_columns(mdp, 0, mdp.shape[0])
+        )
+
+        with open(os.path.join(directory, f"probabilities_{nof}.txt"), "w") as p:
+            p.write(tabulate(list(to_log), "keys", "rst"))
+
+    @staticmethod
+    def export_probabilities(
+        env: MazeEnvironment, nof: str, chunk: int = 65536, directory: str = "logs"
+    ) -> TransitionExport:
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+
+        return TransitionExport.write(
+            env, os.path.join(directory, f"probabilities_{nof}"), chunk
+        )
 
     @staticmethod
-    def log_values(vf: V | Q, nof: str):
-        if not os.path.exists("logs"):
-            os.mkdir("logs")
+    def log_values(vf: V | Q, nof: str, directory: str = "logs"):
+        if not os.path.exists(directory):
+            os.mkdir(directory)
 
-        with open(f"./logs/{vf.__class__.__name__.lower()}_values_{nof}.txt", "w") as v:
+        name = f"{vf.__class__.__name__.lower()}_values_{nof}.txt"
+        with open(os.path.join(directory, name), "w") as v:
             v.write(vf.__str__())
@@ -0,0 +1,173 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from maze.utils import *
+
+
+class CompiledMDP:
+    """
+    Array form of a MazeEnvironment, built once at construction.
+
+    States are indexed by their row in `positions`, actions by
+    Action.get_all_actions() and directions by Direction.get_all_directions().
+    Since the cell reached by following a direction does not depend on the
+    action taken, the whole transition model is
+
+    - next_states[s, d] - index of the state reached from s following d,
+    - rewards[s, d] - reward for following d from s,
+    - probabilities[s, a, d] - probability of following d when taking a in s,
+
+    where directions unavailable in s have zero probability.
+    """
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self.__positions
+
+    @property
+    def states(self) -> list[State]:
+        """
+        State objects are only built on first access, so purely array-based
+        solvers never need them.
+        """
+        if self.__states is None:
+            self.__states = [State(p) for p in self.__positions.tolist()]
+        return self.__states
+
+    @property
+    def index(self) -> dict[State, int]:
+        if self.__index is None:
+            self.__index = {s: i for i, s in enumerate(self.states)}
+        return self.__index
+
+    @property
+    def next_states(self) -> np.ndarray:
+        return self.__next_states
+
+    @property
+    def rewards(self) -> np.ndarray:
+        return self.__rewards
+
+    @property
+    def probabilities(self) -> np.ndarray:
+        return self.__probabilities
+
+    @property
+    def terminal(self) -> np.ndarray:
+        return self.__terminal
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.__valid
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self.__probabilities.shape
+
+    def __init__(
+        self,
+        positions: np.ndarray,
+        next_states: np.ndarray,
+        rewards: np.ndarray,
+        probabilities: np.ndarray,
+        terminal: np.ndarray,
+        valid: np.ndarray,
+    ) -> None:
+        self.__positions: np.ndarray = positions
+        self.__states: list[State] | None = None
+        self.__index: dict[State, int] | None = None
+        self.__next_states: np.ndarray = next_states
+        self.__rewards: np.ndarray = rewards
+        self.__probabilities: np.ndarray = probabilities
+        self.__terminal: np.ndarray = terminal
+        self.__valid: np.ndarray = valid
+
+    def expected_rewards(self) -> np.ndarray:
+        """
+        r(s, a) = sum_{d}{p(d | s, a) * r(s, d)}, shaped (S, A).
+        """
+        return np.einsum("sad,sd->sa", self.__probabilities, self.__rewards)
+
+    def backup(
+        self, v: np.ndarray, gamma: float, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        One Bellman backup of the state values v for every state and action:
+        q(s, a) = sum_{d}{p(d | s, a) * (r(s, d) + gamma * v(s+))}, shaped (S, A).
+        """
+        returns = self.__rewards + gamma * v[self.__next_states]
+        return np.einsum("sad,sd->sa", self.__probabilities, returns, out=out)
+
+    def predecessors(self) -> csr_matrix:
+        """
+        Sparse (S, S) matrix whose row s+ holds every state s from which some
+        action reaches s+ with non-zero probability.
+        """
+        no_states = self.shape[0]
+        reachable = self.__valid & (self.__probabilities > 0.0).any(axis=1)
+        sources = np.broadcast_to(np.arange(no_states)[:, None], reachable.shape)
+
+        predecessors = csr_matrix(
+            (
+                np.ones(reachable.sum(), dtype=bool),
+                (self.__next_states[reachable], sources[reachable]),
+            ),
+            shape=(no_states, no_states),
+        )
+        predecessors.sum_duplicates()
+        return predecessors
+
+    def transition_matrix(self) -> csr_matrix:
+        """
+        Sparse P[s * A + a, s+], summing directions that lead to the same state.
+        """
+        no_states, no_actions, no_directions = self.shape
+        rows = np.repeat(np.arange(no_states * no_actions), no_directions)
+        cols = np.repeat(self.__next_states, no_actions, axis=0).ravel()
+        data = self.__probabilities.ravel()
+        keep = data != 0.0
+
+        return csr_matrix(
+            (data[keep], (rows[keep], cols[keep])),
+            shape=(no_states * no_actions, no_states),
+        )
+
+    @staticmethod
+    def match(positions: np.ndarray, other_positions: np.ndarray) -> np.ndarray:
+        """
+        Row in other_positions of every row of positions, -1 where missing.
+        """
+        if not len(positions) or not len(other_positions):
+            return np.full(len(positions), -1, dtype=np.int64)
+
+        dims = np.maximum(positions.max(axis=0), other_positions.max(axis=0)) + 1
+        keys = np.ravel_multi_index(positions.T, dims)
+        other_keys = np.ravel_multi_index(other_positions.T, dims)
+
+        order = np.argsort(other_keys)
+        found = np.searchsorted(other_keys[order], keys).clip(max=len(order) - 1)
+        return np.where(other_keys[order][found] == keys, order[found], -1)
+
+    def changed(
+        self, other: "CompiledMDP", previous: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Mask of the states whose transitions differ from those of the same
+        position in other, new states included. previous is the result of
+        match(self.positions, other.positions), if already known.
+        """
+        if previous is None:
+            previous = CompiledMDP.match(self.__positions, other.positions)
+        old = previous.clip(min=0)
+
+        next_positions = self.__positions[self.__next_states]
+        other_next_positions = other.positions[other.next_states[old]]
+
+        return (
+            (previous < 0)
+            | (self.__terminal != other.terminal[old])
+            | (self.__valid != other.valid[old]).any(axis=1)
+            | (self.__rewards != other.rewards[old]).any(axis=1)
+            | (next_positions != other_next_positions).any(axis=(1, 2))
+            | (self.__probabilities != other.probabilities[old]).any(axis=(1, 2))
+        )
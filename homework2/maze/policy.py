@@ -1,4 +1,7 @@
 from abc import ABC, abstractmethod
+from weakref import ref
+
+import numpy as np
 
 from maze.env import MazeEnvironment
 from maze.value_funcs import Q, V
@@ -41,3 +44,59 @@ class GreedyPolicy(Policy):
             v_values.append((v_sum, a))
 
         return max(v_values, key=lambda x: x[0])[1]
+
+
+class CachedGreedyPolicy(GreedyPolicy):
+    """
+    Greedy policy that computes the greedy action of every state at once from
+    the compiled MDP and caches the table. The cache is rebuilt only when the
+    environment, its compiled MDP, the value function, its version or gamma
+    change, so repeated queries are plain lookups. The objects are held by
+    weak reference: a cache never keeps them alive, and a new object can not
+    pass for a collected one that had the same id.
+    """
+
+    def __init__(self) -> None:
+        self.__refs: tuple[ref, ...] = ()
+        self.__key: tuple[int, float] | None = None
+        self.__values: np.ndarray = np.zeros((0, 0))
+        self.__table: np.ndarray = np.zeros(0, dtype=np.int64)
+
+    def __refresh(self, env: MazeEnvironment, vf: V | Q, gamma: float) -> None:
+        sources = (env, env.mdp, vf)
+        key = (vf.version, gamma)
+        if key == self.__key and all(
+            r() is source for r, source in zip(self.__refs, sources)
+        ):
+            return
+
+        if isinstance(vf, Q):
+            self.__values = vf.values
+            self.__table = vf.greedy()
+        else:
+            self.__values = env.mdp.backup(vf.values, gamma)
+            self.__values.flags.writeable = False
+            self.__table = np.argmax(self.__values, axis=1)
+        self.__refs = tuple(ref(source) for source in sources)
+        self.__key = key
+
+    def action_values(
+        self, env: MazeEnvironment, vf: V | Q, gamma: float
+    ) -> np.ndarray:
+        """
+        Read-only (states, actions) values the greedy actions are chosen
+        from: the Q values, or the one-step backup of the V values.
+        """
+        self.__refresh(env, vf, gamma)
+        return self.__values
+
+    def table(self, env: MazeEnvironment, vf: V | Q, gamma: float) -> np.ndarray:
+        """
+        Index into env.actions of the greedy action for every state, in the
+        order of env.states.
+        """
+        self.__refresh(env, vf, gamma)
+        return self.__table
+
+    def act(self, s: State, env: MazeEnvironment, vf: V | Q, gamma: float) -> Action:
+        return env.actions[self.table(env, vf, gamma)[env.index[s]]]
@@ -0,0 +1,104 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from maze.base import MazeBase, MazeBoard, MazeGraph, SparseMazeGraph
+from maze.env import MazeEnvironment
+from maze.mdp import CompiledMDP
+from maze.utils import EnvType
+from maze.value_funcs import Q, V
+
+MDP_ARRAYS = [
+    "positions",
+    "next_states",
+    "rewards",
+    "probabilities",
+    "terminal",
+    "valid",
+]
+LAYOUT_ARRAYS = [
+    "positions",
+    "kinds",
+    "rewards",
+    "teleport_to",
+    "indptr",
+    "indices",
+    "edge_directions",
+]
+BASES = {cls.__name__: cls for cls in [MazeBoard, MazeGraph, SparseMazeGraph]}
+VALUE_FUNCS = {cls.__name__: cls for cls in [V, Q]}
+
+
+class Snapshot:
+    """
+    Binary snapshot of an environment and its solved value functions.
+
+    A snapshot is a directory holding one .npy file per array - the compiled
+    transition model under mdp/, the maze layout under layout/ and every value
+    table under values/ - next to a meta.json describing how to put them back
+    together. Loading memory-maps the arrays, so reopening even a large maze
+    only reads the pages that get touched and never redraws the random layout.
+    """
+
+    @staticmethod
+    def save(path: str | Path, env: MazeEnvironment, **value_funcs: V | Q) -> Path:
+        """
+        Writes env and the given value functions, keyed by name, to path.
+        """
+        path = Path(path)
+        for folder in ["mdp", "layout", "values"]:
+            (path / folder).mkdir(parents=True, exist_ok=True)
+
+        mdp = env.mdp
+        for name in MDP_ARRAYS:
+            np.save(path / "mdp" / f"{name}.npy", getattr(mdp, name))
+
+        layout = env.base.layout()
+        for name in LAYOUT_ARRAYS:
+            np.save(path / "layout" / f"{name}.npy", layout[name])
+
+        for name, vf in value_funcs.items():
+            np.save(path / "values" / f"{name}.npy", vf.values)
+
+        meta = {
+            "base": type(env.base).__name__,
+            "env_type": env.type.name,
+            "values": {name: type(vf).__name__ for name, vf in value_funcs.items()},
+        }
+        (path / "meta.json").write_text(json.dumps(meta, indent=4))
+
+        return path
+
+    @staticmethod
+    def load(path: str | Path) -> tuple[MazeEnvironment, dict[str, V | Q]]:
+        """
+        Reopens a snapshot. The transition model is mapped read-only, value
+        tables are copied out of their mapping into memory, so solvers can
+        keep refining them without touching the files.
+        """
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+
+        mdp = CompiledMDP(
+            *[
+                np.load(path / "mdp" / f"{name}.npy", mmap_mode="r")
+                for name in MDP_ARRAYS
+            ]
+        )
+
+        layout = {
+            name: np.load(path / "layout" / f"{name}.npy", mmap_mode="r")
+            for name in LAYOUT_ARRAYS
+        }
+        base: MazeBase | SparseMazeGraph = BASES[meta["base"]].from_layout(layout)
+
+        env = MazeEnvironment(base=base, env_type=EnvType[meta["env_type"]], mdp=mdp)
+        value_funcs = {
+            name: VALUE_FUNCS[kind](
+                env, np.load(path / "values" / f"{name}.npy", mmap_mode="r")
+            )
+            for name, kind in meta["values"].items()
+        }
+
+        return env, value_funcs
@@ -1,7 +1,19 @@
 from abc import ABC, abstractmethod
-from enum import Enum, auto
+from enum import Enum, IntEnum, auto
 from random import choices
-from typing import Callable
+from typing import Callable, Iterable
+from weakref import WeakValueDictionary
+
+
+class CellKind(IntEnum):
+    """
+    Integer codes of the cell classes, for array-backed mazes.
+    """
+
+    REGULAR = 0
+    TERMINAL = 1
+    TELEPORT = 2
+    WALL = 3
 
 
 class Cell(ABC):
@@ -9,6 +21,11 @@ class Cell(ABC):
     Interface class for all maze cells.
     """
 
+    @property
+    @abstractmethod
+    def kind(self) -> CellKind:
+        pass
+
     @property
     def reward(self) -> float | None:
         return self.__reward
@@ -35,6 +52,10 @@ class RegularCell(Cell):
     A common, non-terminal, steppable cell.
     """
 
+    @property
+    def kind(self) -> CellKind:
+        return CellKind.REGULAR
+
     @property
     def color(self) -> tuple[int, int, int]:
         return (255, 255, 255) if self.reward == -1 else (255, 0, 0)
@@ -51,6 +72,10 @@ class TerminalCell(Cell):
     game finishes.
     """
 
+    @property
+    def kind(self) -> CellKind:
+        return CellKind.TERMINAL
+
     @property
     def color(self) -> tuple[int, int, int]:
         return 0, 0, 255
@@ -72,6 +97,10 @@ class TeleportCell(Cell):
     teleports nor wall cells.
     """
 
+    @property
+    def kind(self) -> CellKind:
+        return CellKind.TELEPORT
+
     @property
     def reward(self) -> float | None:
         return self.__teleport_to.reward
@@ -85,7 +114,7 @@ class TeleportCell(Cell):
         return self.__teleport_to
 
     @teleport_to.setter
-    def teleport_to(self, teleport_to: Cell):
+    def teleport_to(self, teleport_to: Cell | None):
         self.__teleport_to = teleport_to
 
     @property
@@ -106,6 +135,10 @@ class WallCell(Cell):
     A non steppable, wall cell.
     """
 
+    @property
+    def kind(self) -> CellKind:
+        return CellKind.WALL
+
     @property
     def color(self) -> tuple[int, int, int]:
         return 128, 128, 128
@@ -120,36 +153,65 @@ class WallCell(Cell):
 
 class CellGen:
     def __call__(self, specs: list[tuple[float, Callable]]) -> Cell:
-        return choices(
-            population=[call for _, call in specs],
-            weights=[weight for weight, _ in specs],
-            k=1,
-        )[0]()
+        return self.generate(specs, k=1)[0]
+
+    def generate(self, specs: list[tuple[float, Callable]], k: int) -> list[Cell]:
+        """
+        Draws k cells at once, with a single weighted choice over the specs.
+        """
+        return [
+            call()
+            for call in choices(
+                population=[call for _, call in specs],
+                weights=[weight for weight, _ in specs],
+                k=k,
+            )
+        ]
 
 
 class State:
+    """
+    An immutable, tuple-backed position. States are interned, so building a
+    State for a position that already has one returns the existing object.
+    """
+
+    __slots__ = ("__position", "__hash", "__weakref__")
+    __interned: WeakValueDictionary = WeakValueDictionary()
+
     @property
-    def position(self) -> list[int]:
+    def position(self) -> tuple[int, ...]:
         return self.__position
 
-    def __init__(self, position: list[int]):
-        self.__position: list[int] = position
+    def __new__(cls, position: Iterable[int]):
+        position = tuple(position)
+        state = State.__interned.get(position)
+        if state is None:
+            state = super().__new__(cls)
+            state.__position = position
+            state.__hash = hash(position)
+            State.__interned[position] = state
+        return state
 
     def __getitem__(self, key: int):
         return self.__position[key]
 
     def __hash__(self):
-        return hash(self.__position.__hash__)
+        return self.__hash
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return (
             self.__position == other.__position
             if isinstance(other, State)
-            else self.__position == list(other)
+            else self.__position == tuple(other)
         )
 
+    def __reduce__(self):
+        return State, (self.__position,)
+
     def __str__(self):
-        return str(self.__position)
+        return str(list(self.__position))
 
 
 class Direction(Enum):
@@ -1,95 +1,227 @@
+from collections.abc import Mapping
 from dataclasses import dataclass
-from random import random, choice
+from typing import Any, Iterator
 
+import numpy as np
 from tabulate import tabulate
-from numpy import ones
-from numpy.random import dirichlet
 
-from maze.base import MazeBase
 from maze.env import MazeEnvironment
+from maze.mdp import CompiledMDP
 from maze.utils import *
 
 
+class TableView(Mapping):
+    """
+    Read-only mapping over a value array. One-dimensional arrays are keyed by
+    state, two-dimensional ones by (state, action) pairs, or by state with
+    `best`, giving the maximum over the actions. It is a view: later writes
+    to the array show through.
+    """
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        index: dict[State, int],
+        action_index: dict[Action, int] | None = None,
+        best: bool = False,
+    ) -> None:
+        self.__values: np.ndarray = values
+        self.__index: dict[State, int] = index
+        self.__action_index: dict[Action, int] | None = action_index
+        self.__best: bool = best
+
+    def __getitem__(self, key: Any) -> float:
+        if self.__best:
+            return self.__values[self.__index[key]].max().item()
+        if self.__action_index is None:
+            return self.__values[self.__index[key]].item()
+
+        s, a = key
+        return self.__values[self.__index[s], self.__action_index[a]].item()
+
+    def __iter__(self) -> Iterator:
+        if self.__best or self.__action_index is None:
+            return iter(self.__index)
+        return ((s, a) for s in self.__index for a in self.__action_index)
+
+    def __len__(self) -> int:
+        if self.__best:
+            return len(self.__index)
+        return self.__values.size
+
+
+def initial_values(env: MazeEnvironment, shape: tuple[int, ...]) -> np.ndarray:
+    """
+    Random values in (-10, 0] for non-terminal states and 0 for terminal ones.
+    """
+    values = -10 * np.random.random(shape)
+    values[env.mdp.terminal] = 0.0
+    return values
+
+
 @dataclass
 class Q:
     """
     Class for representing Q values.
+
+    Values are stored in a (states, actions) float64 array, indexed by the
+    environment's state index and the position of the action in env.actions.
+    Values passed in are copied.
     """
 
     @property
     def states(self) -> list[State]:
-        return self.__states
+        return self.__mdp.states
 
     @property
     def actions(self) -> list[Action]:
         return self.__actions
 
     @property
-    def v_table(self) -> dict[State, float]:
-        return {s: self.determine_v(s) for s in self.states}
+    def v_table(self) -> TableView:
+        return TableView(self.__q, self.__mdp.index, best=True)
+
+    @property
+    def q_table(self) -> TableView:
+        return TableView(self.__q, self.__mdp.index, self.__action_index)
 
     @property
-    def q_table(self) -> dict[tuple[State, Action], float]:
-        return self.__q
+    def values(self) -> np.ndarray:
+        """
+        Read-only view of the table. Changes go through assignments to
+        `values` or to single entries, so `version` sees every one of them.
+        """
+        values = self.__q.view()
+        values.flags.writeable = False
+        return values
+
+    @values.setter
+    def values(self, values: np.ndarray) -> None:
+        self.__q[...] = values
+        self.__version += 1
 
-    def __init__(self, env: MazeEnvironment) -> None:
-        self.__states = env.states
+    @property
+    def version(self) -> int:
+        """
+        Incremented on every assignment, so caches derived from the table
+        can tell when they went stale.
+        """
+        return self.__version
+
+    def __init__(self, env: MazeEnvironment, values: np.ndarray | None = None) -> None:
+        self.__mdp: CompiledMDP = env.mdp
         self.__actions = env.actions
+        self.__version: int = 0
 
-        self.__q: dict[tuple[State, Action], float] = {
-            (s, a): -10 * random() if not env.is_terminal(s) else 0.0
-            for s in self.__states
-            for a in self.__actions
+        self.__action_index: dict[Action, int] = {
+            a: j for j, a in enumerate(self.__actions)
         }
+        self.__q: np.ndarray = (
+            initial_values(env, env.mdp.shape[:2])
+            if values is None
+            else np.array(values, dtype=np.float64)
+        )
+
+    def __deepcopy__(self, memo: dict) -> "Q":
+        q = Q.__new__(Q)
+        q.__dict__.update(self.__dict__)
+        q.__q = self.__q.copy()
+        return q
 
     def __getitem__(self, key: tuple[State, Action]) -> float:
-        return self.__q[key]
+        s, a = key
+        return self.__q[self.__mdp.index[s], self.__action_index[a]].item()
 
     def __setitem__(self, key: tuple[State, Action], value: float) -> None:
-        self.__q[key] = value
+        s, a = key
+        self.__q[self.__mdp.index[s], self.__action_index[a]] = value
+        self.__version += 1
 
     def __iter__(self):
-        return iter(self.__q)
+        return iter(self.q_table)
 
     def __str__(self) -> str:
         to_repr = []
-        for s, a in self.__q:
-            to_repr.append({"State": s, "Action": a, "Value": self.__q[(s, a)]})
+        for s, a in self:
+            to_repr.append({"State": s, "Action": a, "Value": self[s, a]})
 
         return tabulate(to_repr, headers="keys", tablefmt="rst")
 
     def determine_v(self, s: State) -> float:
-        return max([self.__q[s, a] for a in self.__actions])
+        return self.__q[self.__mdp.index[s]].max().item()
+
+    def greedy(self) -> np.ndarray:
+        """
+        Index into `actions` of the greedy action of every state.
+        """
+        return np.argmax(self.__q, axis=1)
 
 
 @dataclass
 class V:
+    """
+    Class for representing V values, stored in a float64 array indexed by the
+    environment's state index. Values passed in are copied.
+    """
+
     @property
     def states(self) -> list[State]:
-        return self.__states
+        return self.__mdp.states
 
     @property
-    def v_table(self) -> dict[State, float]:
-        return self.__v
+    def v_table(self) -> TableView:
+        return TableView(self.__v, self.__mdp.index)
 
-    def __init__(self, env: MazeEnvironment) -> None:
-        self.__states: list[State] = env.states
-        self.__v: dict[State, float] = {
-            s: -10 * random() if not env.is_terminal(s) else 0.0 for s in self.__states
-        }
+    @property
+    def values(self) -> np.ndarray:
+        """
+        Read-only view of the table, see Q.values.
+        """
+        values = self.__v.view()
+        values.flags.writeable = False
+        return values
+
+    @values.setter
+    def values(self, values: np.ndarray) -> None:
+        self.__v[...] = values
+        self.__version += 1
+
+    @property
+    def version(self) -> int:
+        """
+        Incremented on every assignment, so caches derived from the table
+        can tell when they went stale.
+        """
+        return self.__version
+
+    def __init__(self, env: MazeEnvironment, values: np.ndarray | None = None) -> None:
+        self.__mdp: CompiledMDP = env.mdp
+        self.__version: int = 0
+        self.__v: np.ndarray = (
+            initial_values(env, env.mdp.shape[:1])
+            if values is None
+            else np.array(values, dtype=np.float64)
+        )
+
+    def __deepcopy__(self, memo: dict) -> "V":
+        v = V.__new__(V)
+        v.__dict__.update(self.__dict__)
+        v.__v = self.__v.copy()
+        return v
 
     def __getitem__(self, s: State) -> float:
-        return self.__v[s]
+        return self.__v[self.__mdp.index[s]].item()
 
     def __setitem__(self, s: State, value: float) -> None:
-        self.__v[s] = value
+        self.__v[self.__mdp.index[s]] = value
+        self.__version += 1
 
     def __iter__(self):
-        return iter(self.__v)
+        return iter(self.__mdp.index)
 
     def __str__(self) -> str:
         to_repr = []
-        for s in self.__v:
-            to_repr.append({"State": s, "Value": self.__v[s]})
+        for s in self.__mdp.index:
+            to_repr.append({"State": s, "Value": self[s]})
 
         return tabulate(to_repr, headers="keys", tablefmt="rst")
@@ -2,3 +2,4 @@ from tests.test_db import *
 from tests.test_dg import *
 from tests.test_sb import *
 from tests.test_sg import *
+from tests.test_mdp import *
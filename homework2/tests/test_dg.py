@@ -11,7 +11,7 @@ DEFAULT_SPECS = [
 ]
 
 
-def test_deterministic_graph():
+def test_deterministic_graph(tmp_path):
     _, axes = plt.subplots(nrows=2, ncols=3, figsize=(15, 15))
     axes = axes.flatten()
 
@@ -52,8 +52,8 @@ def test_deterministic_graph():
     )
     axes[5].set_title("Optimal policy determined by V values")
 
-    Info.log_probabilities(env=env, nof="dg")
+    Info.log_probabilities(env=env, nof="dg", directory=str(tmp_path))
 
-    Info.log_values(vf=q_iteration.q, nof="dg")
-    Info.log_values(vf=v_iteration.v, nof="dg")
+    Info.log_values(vf=q_iteration.q, nof="dg", directory=str(tmp_path))
+    Info.log_values(vf=v_iteration.v, nof="dg", directory=str(tmp_path))
     plt.show()
@@ -0,0 +1,367 @@
+from random import random, seed
+
+import numpy as np
+import pytest
+
+from maze import *
+
+DEFAULT_SPECS = [
+    (10, lambda: RegularCell(-1)),
+    (2, lambda: RegularCell(-10)),
+    (2, lambda: WallCell(-11)),
+    (1, lambda: TerminalCell(-1)),
+    (1, lambda: TeleportCell()),
+]
+
+
+def make_base(kind: str, size: int) -> MazeBoard | MazeGraph:
+    """
+    A random board or graph, seeded by its size so every run sees the same
+    layout.
+    """
+    seed(size)
+    np.random.seed(size)
+    if kind == "board":
+        return MazeBoard(size=(size, size), specs=DEFAULT_SPECS)
+    return MazeGraph(size, DEFAULT_SPECS)
+
+
+@pytest.fixture(params=[("board", 8), ("graph", 15)], ids=["board", "graph"])
+def base(request) -> MazeBoard | MazeGraph:
+    return make_base(*request.param)
+
+
+@pytest.fixture(
+    params=[EnvType.DETERMINISTIC, EnvType.STOCHASTIC],
+    ids=["deterministic", "stochastic"],
+)
+def env_type(request) -> EnvType:
+    return request.param
+
+
+@pytest.fixture
+def env(base: MazeBoard | MazeGraph, env_type: EnvType) -> MazeEnvironment:
+    return MazeEnvironment(base=base, env_type=env_type)
+
+
+def test_compiled_mdp(env: MazeEnvironment):
+    GAMMA = 0.9
+
+    v = np.array([-10 * random() for _ in env.states])
+    q = env.mdp.backup(v, GAMMA)
+
+    p = env.mdp.transition_matrix()
+    r = env.mdp.expected_rewards().ravel()
+    assert np.allclose(q.ravel(), r + GAMMA * (p @ v))
+
+    for s in env.states:
+        for a in env.actions:
+            expected = sum(
+                mdp["probability"]
+                * (mdp["reward"] + GAMMA * v[env.mdp.index[mdp["next_state"]]])
+                for mdp in env(s, a)
+            )
+            i, j = env.mdp.index[s], env.actions.index(a)
+            assert np.isclose(q[i, j], expected)
+
+
+def test_vectorized_iteration(env: MazeEnvironment):
+    GAMMA = 0.9
+    EPS = 1e-6
+
+    v_iteration = VIteration(env, gamma=GAMMA)
+    v_iteration.run(eps=EPS)
+    fast_v_iteration = VectorizedVIteration(env, gamma=GAMMA)
+    fast_v_iteration.run(eps=EPS)
+
+    q_iteration = QIteration(env, gamma=GAMMA)
+    q_iteration.run(eps=EPS)
+    fast_q_iteration = VectorizedQIteration(env, gamma=GAMMA)
+    fast_q_iteration.run(eps=EPS)
+
+    for s in env.states:
+        assert np.isclose(v_iteration.v[s], fast_v_iteration.v[s], atol=1e-3)
+        assert np.isclose(
+            q_iteration.q.determine_v(s),
+            fast_q_iteration.q.determine_v(s),
+            atol=1e-3,
+        )
+
+
+def test_asynchronous_iteration(env: MazeEnvironment):
+    GAMMA = 0.9
+    EPS = 1e-6
+
+    v_iteration = VectorizedVIteration(env, gamma=GAMMA)
+    v_iteration.run(eps=EPS)
+    gs_iteration = GaussSeidelVIteration(env, gamma=GAMMA)
+    gs_iteration.run(eps=EPS)
+    ps_iteration = PrioritizedSweepingVIteration(env, gamma=GAMMA)
+    sweeps = ps_iteration.run(eps=EPS)
+
+    # Every solver reports sweeps, the single backups are counted separately.
+    assert sweeps == ps_iteration.backups // int((~env.mdp.terminal).sum())
+
+    for s in env.states:
+        assert np.isclose(v_iteration.v[s], gs_iteration.v[s], atol=1e-3)
+        assert np.isclose(v_iteration.v[s], ps_iteration.v[s], atol=1e-3)
+
+
+def test_policy_iteration(env: MazeEnvironment):
+    GAMMA = 0.9
+    EPS = 1e-8
+
+    v_iteration = VectorizedVIteration(env, gamma=GAMMA)
+    v_iteration.run(eps=EPS)
+
+    for direct_limit in [10000, 0]:
+        policy_iteration = PolicyIteration(env, gamma=GAMMA, direct_limit=direct_limit)
+        policy_iteration.run(eps=EPS)
+
+        assert np.allclose(v_iteration.v.values, policy_iteration.v.values, atol=1e-6)
+
+
+@pytest.mark.parametrize("size", [8, 16])
+def test_undiscounted_policy_iteration(size: int, env_type: EnvType):
+    EPS = 1e-10
+
+    base = make_base("board", size)
+    env = MazeEnvironment(base=base, env_type=env_type)
+    v_iteration = VectorizedVIteration(env)
+    v_iteration.run(eps=EPS, iterations=100000)
+
+    for direct_limit in [10000, 0]:
+        policy_iteration = PolicyIteration(env, direct_limit=direct_limit)
+        iterations = policy_iteration.run()
+
+        assert iterations < 1000
+        assert np.allclose(v_iteration.v.values, policy_iteration.v.values, atol=1e-6)
+
+    # Without terminal states no policy ends, and v = r_pi + P_pi v is singular.
+    for s in env.states:
+        if isinstance(base[s], TerminalCell):
+            base[s] = RegularCell(-1)
+    env.update()
+    with pytest.raises(ValueError):
+        PolicyIteration(env).run()
+
+
+def test_cached_greedy_policy(env: MazeEnvironment):
+    GAMMA = 0.9
+
+    greedy, cached = GreedyPolicy(), CachedGreedyPolicy()
+
+    for vf in [V(env=env), Q(env=env)]:
+        # Actions may tie (e.g. every edge of a graph node leading to the same
+        # node), so compare their values.
+        def value(s: State, a: Action) -> float:
+            if isinstance(vf, Q):
+                return vf[s, a]
+            return sum(
+                t["probability"] * (t["reward"] + GAMMA * vf[t["next_state"]])
+                for t in env(s, a)
+            )
+
+        for _ in range(2):
+            for s in env.states:
+                assert np.isclose(
+                    value(s, greedy.act(s, env, vf, GAMMA)),
+                    value(s, cached.act(s, env, vf, GAMMA)),
+                )
+
+            values = cached.action_values(env, vf, GAMMA)
+            for s in env.states:
+                for i, a in enumerate(env.actions):
+                    assert np.isclose(values[env.index[s], i], value(s, a))
+            with pytest.raises(ValueError):
+                values[0, 0] = 0.0
+
+            # Any assignment has to invalidate the cached table.
+            for s in env.states:
+                if isinstance(vf, V):
+                    vf[s] = -10 * random()
+                else:
+                    for a in env.actions:
+                        vf[s, a] = -10 * random()
+
+        # Tables can not be changed behind the version counter's back.
+        with pytest.raises(ValueError):
+            vf.values[0] = 0.0
+
+    # A new value function is never served the table of an old one, even if
+    # it got the same id and version.
+    for _ in range(5):
+        q = Q(env=env)
+        assert np.array_equal(cached.table(env, q, GAMMA), q.greedy())
+        del q
+
+
+def test_value_tables(env: MazeEnvironment):
+    no_states, no_actions, _ = env.mdp.shape
+
+    values = np.zeros((no_states, no_actions))
+    q = Q(env=env, values=values)
+    v_table = q.v_table
+    assert len(v_table) == no_states
+
+    # Tables own their values: the caller's array stays as it was.
+    s = env.states[0]
+    q[s, env.actions[0]] = 5.0
+    assert values[0, 0] == 0.0
+
+    # ... and the views follow later writes.
+    assert v_table[s] == 5.0
+    q.values = -np.ones((no_states, no_actions))
+    assert v_table[s] == -1.0
+    assert q.v_table[s] == q.determine_v(s)
+
+    values = np.zeros(no_states)
+    v = V(env=env, values=values)
+    v[s] = 5.0
+    assert values[0] == 0.0
+
+
+def test_sparse_graph():
+    GAMMA = 0.9
+    EPS = 1e-8
+
+    graph = SparseMazeGraph(2000, DEFAULT_SPECS, seed=0)
+    env = MazeEnvironment(base=graph, env_type=EnvType.STOCHASTIC)
+    mdp = env.mdp
+
+    for i, s in enumerate(env.states):
+        node = s[0]
+        start, end = graph.indptr[node], graph.indptr[node + 1]
+        assert mdp.valid[i].sum() == end - start
+        for target, d in zip(
+            graph.indices[start:end], graph.edge_directions[start:end]
+        ):
+            if graph.kinds[target] == CellKind.WALL:
+                target, reward = node, graph.rewards[node]
+            elif target == node:
+                reward = -11
+            else:
+                reward = graph.rewards[target]
+            if graph.kinds[target] == CellKind.TELEPORT:
+                target = graph.teleport_to[target]
+
+            assert mdp.positions[mdp.next_states[i, d], 0] == target
+            assert mdp.rewards[i, d] == reward
+
+    v_iteration = VectorizedVIteration(env, gamma=GAMMA)
+    v_iteration.run(eps=EPS)
+    policy_iteration = PolicyIteration(env, gamma=GAMMA)
+    policy_iteration.run(eps=EPS)
+    assert np.allclose(v_iteration.v.values, policy_iteration.v.values, atol=1e-3)
+
+
+@pytest.mark.parametrize("kind", ["board", "graph", "sparse"])
+def test_snapshot(tmp_path, kind: str):
+    GAMMA = 0.9
+    EPS = 1e-8
+
+    if kind == "sparse":
+        base = SparseMazeGraph(500, DEFAULT_SPECS, seed=0)
+    else:
+        base = make_base(kind, 8 if kind == "board" else 15)
+    env = MazeEnvironment(base=base, env_type=EnvType.STOCHASTIC)
+    v_iteration = VectorizedVIteration(env, gamma=GAMMA)
+    v_iteration.run(eps=EPS)
+    q_iteration = VectorizedQIteration(env, gamma=GAMMA)
+    q_iteration.run(eps=EPS)
+
+    path = Snapshot.save(tmp_path, env, v=v_iteration.v, q=q_iteration.q)
+    loaded, value_funcs = Snapshot.load(path)
+
+    assert type(loaded.base) is type(base)
+    for original, restored in zip(base.transitions(), loaded.base.transitions()):
+        assert np.array_equal(original, restored)
+    for name in ["next_states", "rewards", "probabilities", "terminal"]:
+        assert np.array_equal(getattr(env.mdp, name), getattr(loaded.mdp, name))
+
+    assert isinstance(value_funcs["v"], V) and isinstance(value_funcs["q"], Q)
+    assert np.array_equal(value_funcs["v"].values, v_iteration.v.values)
+    assert np.array_equal(value_funcs["q"].values, q_iteration.q.values)
+    for s in env.states[:10]:
+        assert value_funcs["v"][s] == v_iteration.v[s]
+        assert loaded(s, Action.ACTION_A1) == env(s, Action.ACTION_A1)
+
+
+def test_snapshot_board_shape(tmp_path):
+    # With the bottom row walled off, no state lies in the last row.
+    base = make_base("board", 5)
+    for j in range(5):
+        base[4, j] = WallCell(-11)
+    env = MazeEnvironment(base=base, env_type=EnvType.DETERMINISTIC)
+
+    loaded, _ = Snapshot.load(Snapshot.save(tmp_path, env))
+    assert loaded.base.size == (5, 5)
+    assert all(loaded.base[4, j].kind == CellKind.WALL for j in range(5))
+
+    layout = base.layout()
+    layout["kinds"] = layout["kinds"][:-1]
+    with pytest.raises(ValueError):
+        MazeBoard.from_layout(layout)
+
+
+def test_transition_export(tmp_path, env: MazeEnvironment):
+    export = TransitionExport.write(env, tmp_path, 7)
+
+    expected = [
+        (s, a, t["direction"], t["next_state"], t["reward"], t["probability"])
+        for s in env.states
+        for a in env.actions
+        for t in env(s, a)
+    ]
+    assert len(export) == len(expected)
+    assert [tuple(row.values()) for row in export.rows(chunk=5)] == expected
+
+
+@pytest.mark.parametrize("kind, size", [("board", 16), ("graph", 40)])
+def test_incremental_iteration(kind: str, size: int, env_type: EnvType):
+    GAMMA = 0.9
+    EPS = 1e-12
+    EDITS = [
+        (2, WallCell(-11)),
+        (2, RegularCell(-10)),
+        (3, TerminalCell(-1)),
+        (4, TeleportCell()),
+        (3, RegularCell(-1)),
+        (2, RegularCell(-1)),
+    ]
+
+    base = make_base(kind, size)
+    env = MazeEnvironment(base=base, env_type=env_type)
+    incremental = IncrementalVIteration(env, gamma=GAMMA)
+    incremental.run(eps=EPS)
+
+    regular = [s for s in env.states if isinstance(base[s], RegularCell)]
+    for part, cell in EDITS:
+        base[regular[len(regular) // part]] = cell
+        dirty = env.update()
+        assert len(dirty) <= len(env.states)
+
+        incremental.run(eps=EPS)
+        full = VectorizedVIteration(env, gamma=GAMMA)
+        sweeps = full.run(eps=EPS) + 1
+
+        assert np.allclose(incremental.v.values, full.v.values, rtol=0, atol=1e-9)
+        if isinstance(base, MazeBoard):
+            # A local edit must not cost as much as a full solve.
+            assert incremental.backups < sweeps * len(env.states)
+
+
+def test_set_teleport():
+    base = make_base("board", 8)
+    teleports = [base[s] for s in base if isinstance(base[s], TeleportCell)]
+    assert teleports
+
+    # A target outside the board is kept only when asked to.
+    outside = RegularCell(-1)
+    for teleport in teleports:
+        teleport.teleport_to = outside
+    base.set_teleport(keep=True)
+    assert all(teleport.teleport_to is outside for teleport in teleports)
+
+    base.set_teleport()
+    assert all(teleport.teleport_to is not outside for teleport in teleports)
@@ -0,0 +1,40 @@
+"""
+Draw throughput of CardDeck.
+
+Run from the homework3 directory with
+
+    python -m benchmarks.deck
+
+Draws through five-set shoes, reshuffles included, for a few cut card
+positions.
+"""
+
+from time import perf_counter
+
+from tabulate import tabulate
+
+from blackjack import *
+
+DRAWS = 1_000_000
+PENETRATIONS = [1.0, 0.75, 0.5]
+
+
+def bench_penetration(penetration: float) -> dict[str, float]:
+    deck = CardDeck(no_sets=5, penetration=penetration, seed=0)
+    draw = deck.draw
+
+    start = perf_counter()
+    for _ in range(DRAWS):
+        draw()
+    elapsed = perf_counter() - start
+
+    return {
+        "Penetration": penetration,
+        "Draws": DRAWS,
+        "Time (s)": elapsed,
+        "Draws/s": DRAWS / elapsed,
+    }
+
+
+if __name__ == "__main__":
+    print(tabulate([bench_penetration(p) for p in PENETRATIONS], "keys", "rst"))
@@ -0,0 +1,46 @@
+"""
+Throughput of the blackjack game loop.
+
+Run from the homework3 directory with
+
+    python -m benchmarks.game_loop
+
+Plays games between two players and a dealer with a fixed seed and no
+learner attached, so only the game itself (dealing, acting, logging
+experiences and notifying) is measured.
+"""
+
+from random import seed
+from time import perf_counter
+
+from tabulate import tabulate
+
+from blackjack import *
+
+GAMES = [1000, 10000, 50000]
+
+
+def bench_games(no_games: int) -> dict[str, float]:
+    seed(no_games)
+    Player.no_players = 0
+    game = Game([Player(), Player()], Dealer(), CardDeck(seed=no_games))
+    q = Q()
+
+    start = perf_counter()
+    for _ in range(no_games):
+        game.play(q, gamma=0.9)
+        for player in game.players:
+            for rnd in player.experiences:
+                player.experiences[rnd].clear()
+    elapsed = perf_counter() - start
+
+    return {
+        "Games": no_games,
+        "Time (s)": elapsed,
+        "Games/s": no_games / elapsed,
+    }
+
+
+if __name__ == "__main__":
+    bench_games(GAMES[0])  # warm-up
+    print(tabulate([bench_games(no_games) for no_games in GAMES], "keys", "rst"))
@@ -1,5 +1,7 @@
 from blackjack.agents import *
+from blackjack.batch import BatchGame, BatchLearner, Transitions
 from blackjack.game import Game
+from blackjack.gamelog import GameLog, NoGameLog, TextGameLog, BufferedGameLog
 from blackjack.info import Info
 from blackjack.montecarlo import IncrMonteCarlo
 from blackjack.policy import *
@@ -29,25 +29,35 @@ class Agent(ABC):
         self.__name = name
 
     def update_total(self, card: Card) -> None:
+        total, has_ace = self.__state.total, self.__state.has_ace
+
         match card.number:
             case CardNumber.ACE:
-                if self.__state.total + 11 <= 21 and not self.__state.has_ace:
-                    self.__state.total += 11
-                    self.__state.has_ace = True
+                if total + 11 <= 21 and not has_ace:
+                    total += 11
+                    has_ace = True
                 else:
-                    self.__state.total += 1
+                    total += 1
             case _:
-                self.__state.total += card.value
-                if self.__state.total > 21:
-                    if self.__state.has_ace:
-                        self.__state.total -= 10
-                        self.__state.has_ace = False
+                total += card.value
+                if total > 21:
+                    if has_ace:
+                        total -= 10
+                        has_ace = False
+
+        self.__state = State(total, has_ace)
+
+    def bust(self) -> None:
+        """
+        Resets the total of a busted agent.
+        """
+        self.__state = State(0, self.__state.has_ace)
 
     def act(self, q: Q, s: State) -> Action:
         return self.__policy.act(q, s)
 
     def reset(self) -> None:
-        self.__state.reset()
+        self.__state = State()
 
 
 class Dealer(Agent):
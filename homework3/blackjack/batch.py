@@ -0,0 +1,267 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+import numpy as np
+from alive_progress import alive_bar
+
+from blackjack.utils import CARDS, Action, Q
+
+HIT, HOLD = Action.HIT.value, Action.HOLD.value
+CARD_VALUES = np.array([card.value for card in CARDS], dtype=np.int8)
+
+
+@dataclass
+class Transitions:
+    """
+    A batch of (s, a, r, s', a') transitions, states split into their total
+    and ace flag. `done` marks the last decision of a hand, whose next state
+    and action are meaningless, and `gains` holds the discounted return from
+    every decision to the end of its hand.
+    """
+
+    totals: np.ndarray
+    aces: np.ndarray
+    actions: np.ndarray
+    rewards: np.ndarray
+    next_totals: np.ndarray
+    next_aces: np.ndarray
+    next_actions: np.ndarray
+    done: np.ndarray
+    gains: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.totals)
+
+    def __getitem__(self, index: np.ndarray | slice) -> "Transitions":
+        return Transitions(**{name: value[index] for name, value in vars(self).items()})
+
+
+class BatchGame:
+    """
+    Plays many independent blackjack tables in lockstep. Every table seats
+    the same players and, optionally, a dealer, and deals from its own shoe.
+    Hands, shoes and actions are kept in arrays over the tables, so every
+    draw or decision is one vectorized step for all of them.
+
+    The rules are those of Game: a common card and an own card for every
+    player, the dealer drawing by DealerPolicy from an empty hand, busted
+    hands counting as 0, and the highest total winning. Players act
+    epsilon-greedily on the Q estimates, each on its own hand.
+    """
+
+    @property
+    def tables(self) -> int:
+        return self.__tables
+
+    @property
+    def no_players(self) -> int:
+        return self.__no_players
+
+    def __init__(
+        self,
+        tables: int = 1000,
+        no_players: int = 2,
+        dealer: bool = True,
+        epsilon: float = 0.1,
+        no_sets: int = 5,
+        penetration: float = 1.0,
+        seed: int | np.random.SeedSequence | None = None,
+    ) -> None:
+        if not 0.0 < penetration <= 1.0:
+            raise ValueError("Penetration must be in (0, 1]!")
+
+        self.__tables: int = tables
+        self.__no_players: int = no_players
+        self.__dealer: bool = dealer
+        self.__epsilon: float = epsilon
+        self.__rng: np.random.Generator = np.random.default_rng(seed)
+
+        shoe = np.tile(CARD_VALUES, no_sets)
+        self.__shoes: np.ndarray = self.__rng.permuted(
+            np.tile(shoe, (tables, 1)), axis=1
+        )
+        self.__cut: int = max(1, int(penetration * len(shoe)))
+        self.__cursors: np.ndarray = np.zeros(tables, dtype=np.int64)
+
+    def __draw(self, tables: np.ndarray) -> np.ndarray:
+        """
+        Values of the next card of every given table's shoe.
+        """
+        spent = tables[self.__cursors[tables] >= self.__cut]
+        if len(spent):
+            self.__shoes[spent] = self.__rng.permuted(self.__shoes[spent], axis=1)
+            self.__cursors[spent] = 0
+
+        values = self.__shoes[tables, self.__cursors[tables]]
+        self.__cursors[tables] += 1
+        return values
+
+    @staticmethod
+    def __add(
+        totals: np.ndarray, aces: np.ndarray, values: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Agent.update_total for arrays of hands.
+        """
+        is_ace = values == 1
+        soft = is_ace & ~aces & (totals + 11 <= 21)
+        totals = totals + np.where(soft, 11, values)
+        aces = aces | soft
+
+        hard = ~is_ace & (totals > 21) & aces
+        return np.where(hard, totals - 10, totals), aces & ~hard
+
+    def __act(self, q: Q, totals: np.ndarray, aces: np.ndarray):
+        q = q.gather(totals, aces)
+        greedy = np.where(q[:, HIT] > q[:, HOLD], HIT, HOLD)
+
+        explore = self.__rng.random(len(totals)) <= self.__epsilon
+        coin = np.where(self.__rng.random(len(totals)) > 0.5, HOLD, HIT)
+        return np.where(explore, coin, greedy)
+
+    def __play_hand(
+        self, q: Q, totals: np.ndarray, aces: np.ndarray
+    ) -> tuple[np.ndarray, ...]:
+        """
+        Plays one player's hand on every table. Returns the final totals and
+        the (steps, tables) totals, ace flags, actions and validity of every
+        decision taken.
+        """
+        tables = np.arange(self.__tables)
+        active = np.ones(self.__tables, dtype=bool)
+        actions = self.__act(q, totals, aces)
+        steps = []
+
+        while active.any():
+            steps.append((totals.copy(), aces.copy(), actions.copy(), active.copy()))
+            hit = active & (actions == HIT)
+            active = hit
+
+            drawn = tables[hit]
+            totals[drawn], aces[drawn] = BatchGame.__add(
+                totals[drawn], aces[drawn], self.__draw(drawn)
+            )
+
+            busted = hit & (totals > 21)
+            totals[busted] = 0
+            active &= ~busted
+            actions[active] = self.__act(q, totals[active], aces[active])
+
+        return totals, *(np.stack(column) for column in zip(*steps))
+
+    def __play_dealer(self) -> np.ndarray:
+        tables = np.arange(self.__tables)
+        totals = np.zeros(self.__tables, dtype=np.int64)
+        aces = np.zeros(self.__tables, dtype=bool)
+
+        hit = totals < 17
+        while hit.any():
+            drawn = tables[hit]
+            totals[drawn], aces[drawn] = BatchGame.__add(
+                totals[drawn], aces[drawn], self.__draw(drawn)
+            )
+            totals[totals > 21] = 0
+            hit &= (totals < 17) & (totals > 0)
+
+        return totals
+
+    def play(self, q: Q, gamma: float = 1.0) -> Transitions:
+        """
+        Plays one game, i.e. one round per player, on every table and returns
+        the players' transitions.
+        """
+        tables = np.arange(self.__tables)
+        batches = []
+
+        for _ in range(self.__no_players):
+            common = self.__draw(tables)
+            hands = []
+            for _ in range(self.__no_players):
+                totals = np.zeros(self.__tables, dtype=np.int64)
+                aces = np.zeros(self.__tables, dtype=bool)
+                totals, aces = BatchGame.__add(totals, aces, common)
+                totals, aces = BatchGame.__add(totals, aces, self.__draw(tables))
+                hands.append(self.__play_hand(q, totals, aces))
+
+            finals = [hand[0] for hand in hands]
+            if self.__dealer:
+                finals.append(self.__play_dealer())
+            finals = np.stack(finals)
+
+            winners = finals == finals.max(axis=0)
+            sole = winners.sum(axis=0) == 1
+            for p, (_, totals, aces, actions, valid) in enumerate(hands):
+                result = np.where(winners[p], np.where(sole, 1.0, 0.0), -1.0)
+                batches.append(
+                    BatchGame.__transitions(totals, aces, actions, valid, result, gamma)
+                )
+
+        return Transitions(
+            **{
+                name: np.concatenate([getattr(batch, name) for batch in batches])
+                for name in vars(batches[0])
+            }
+        )
+
+    @staticmethod
+    def __transitions(
+        totals: np.ndarray,
+        aces: np.ndarray,
+        actions: np.ndarray,
+        valid: np.ndarray,
+        result: np.ndarray,
+        gamma: float,
+    ) -> Transitions:
+        """
+        Turns the (steps, tables) decisions of a hand into transitions. A
+        decision followed by another one gets reward 0, the last one the
+        result of the round.
+        """
+        following = np.zeros_like(valid)
+        following[:-1] = valid[1:]
+        nexts = np.roll(np.arange(len(valid)), -1)
+
+        done = valid & ~following
+        remaining = valid.sum(axis=0) - 1 - np.arange(len(valid))[:, None]
+        rewards = np.where(done, result, 0.0)
+        gains = result * gamma ** remaining.clip(min=0)
+
+        return Transitions(
+            totals[valid],
+            aces[valid],
+            actions[valid],
+            rewards[valid],
+            totals[nexts][valid],
+            aces[nexts][valid],
+            actions[nexts][valid],
+            done[valid],
+            gains[valid],
+        )
+
+
+class BatchLearner(ABC):
+    """
+    A learner that can be trained on the transitions of a BatchGame.
+    """
+
+    q: Q
+    gamma: float
+
+    @abstractmethod
+    def update_batch(self, transitions: Transitions) -> None:
+        pass
+
+    def run_batch(self, game: BatchGame, iterations: int = 1000) -> Q:
+        """
+        Learns from games played on all tables of the batch at once, until at
+        least `iterations` games were played.
+        """
+        print(f"Starting batched {self.__class__.__name__}...")
+
+        with alive_bar(iterations) as bar:
+            for played in range(0, iterations, game.tables):
+                self.update_batch(game.play(self.q, self.gamma))
+                bar(min(game.tables, iterations - played))
+
+        print(f"Finished batched {self.__class__.__name__}!")
+        return self.q
@@ -1,4 +1,4 @@
-from copy import copy, deepcopy
+from copy import copy
 
 from observer import Observable
 
@@ -58,7 +58,7 @@ class Game(Observable):
 
                 if action == Action.HOLD:
                     isinstance(player, Dealer) or player.log_experience(
-                        rnd, [deepcopy(player.state), action, 0.0, None]
+                        rnd, [player.state, action, 0.0, None]
                     )
 
                     # Determine if this is the new max_total.
@@ -70,16 +70,17 @@ class Game(Observable):
                     break
 
                 card = self.__deck.draw()
+                # States are immutable, so the logged state stays as it was.
+                old_state = player.state
                 isinstance(player, Dealer) or player.log_experience(
-                    rnd, [deepcopy(player.state), action, 0.0, card]
+                    rnd, [old_state, action, 0.0, card]
                 )
-                old_state = deepcopy(player.state)
                 player.update_total(card)
 
                 if player.state.total > 21:
                     # Player busts, and we "reset" its score.
                     # print(f"{player.name} busted!")
-                    player.state.total = 0
+                    player.bust()
                     break
                 else:
                     new_action = player.act(q, player.state)
@@ -115,15 +116,13 @@ class Game(Observable):
             if len(winners) == 1:
                 if not isinstance(winners[0], Dealer):
                     winners[0].build_gains(rnd, 1.0, gamma)
-                    state = deepcopy(winners[0].experiences[rnd][-1][0])
-                    action = deepcopy(winners[0].experiences[rnd][-1][1])
+                    state, action = winners[0].experiences[rnd][-1][:2]
                     reward = 1.0
                     self.notify(state, action, reward, None, None)
             else:
                 for winner in winners:
                     if not isinstance(winner, Dealer):
-                        state = deepcopy(winner.experiences[rnd][-1][0])
-                        action = deepcopy(winner.experiences[rnd][-1][1])
+                        state, action = winner.experiences[rnd][-1][:2]
                         reward = 0.0
                         self.notify(state, action, reward, None, None)
 
@@ -134,8 +133,7 @@ class Game(Observable):
                 if not isinstance(player, Dealer):
                     if player not in winners:
                         player.build_gains(rnd, -1.0, gamma)
-                        state = deepcopy(player.experiences[rnd][-1][0])
-                        action = deepcopy(player.experiences[rnd][-1][1])
+                        state, action = player.experiences[rnd][-1][:2]
                         reward = -1.0
                         self.notify(state, action, reward, None, None)
 
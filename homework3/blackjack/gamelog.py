@@ -0,0 +1,139 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from queue import Queue
+from threading import Thread
+
+from blackjack.game import Game
+from blackjack.info import Info
+
+
+class GameLog(ABC):
+    """
+    A logging policy for the games played by a trainer.
+
+    A log belongs to whoever created it: trainers only write to it, so one
+    log can follow several runs. Closing it, directly or by leaving a with
+    block, is up to the owner.
+    """
+
+    @abstractmethod
+    def log(self, game: Game, game_number: int) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "GameLog":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+class NoGameLog(GameLog):
+    """
+    Logs nothing.
+    """
+
+    def log(self, game: Game, game_number: int) -> None:
+        pass
+
+
+class TextGameLog(GameLog):
+    """
+    Appends every `every`-th game to <directory>/game_log_<nof>.txt as
+    rendered by Info.log_game, starting from an empty file.
+    """
+
+    def __init__(self, nof: str, every: int = 1, directory: str = "logs") -> None:
+        self.__nof: str = nof
+        self.__every: int = every
+        self.__directory: str = directory
+
+        path = os.path.join(directory, f"game_log_{nof}.txt")
+        if os.path.exists(path):
+            os.remove(path)
+
+    def log(self, game: Game, game_number: int) -> None:
+        if game_number % self.__every == 0:
+            Info.log_game(game, game_number, self.__nof, self.__directory)
+
+
+class BufferedGameLog(GameLog):
+    """
+    Writes every `every`-th game as one compact JSON line to
+    <directory>/game_log_<nof>.jsonl. Lines are collected in memory and handed to a
+    background thread `buffer` at a time, so the trainer never waits on the
+    file. Every line holds the game number and, per player and round, the
+    list of [total, has_ace, action, gain, drawn card] experiences.
+
+    The log has to be closed for the last lines to be written, and can not
+    be written to afterwards.
+    """
+
+    def __init__(
+        self, nof: str, every: int = 1, buffer: int = 1000, directory: str = "logs"
+    ) -> None:
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+
+        self.__every: int = every
+        self.__buffer: int = buffer
+        self.__lines: list[str] = []
+        self.__closed: bool = False
+        self.__queue: Queue[list[str] | None] = Queue()
+        self.__writer: Thread = Thread(
+            target=BufferedGameLog.__write,
+            args=(os.path.join(directory, f"game_log_{nof}.jsonl"), self.__queue),
+            daemon=True,
+        )
+        self.__writer.start()
+
+    @staticmethod
+    def __write(path: str, queue: Queue) -> None:
+        with open(path, "w") as f:
+            while (lines := queue.get()) is not None:
+                f.writelines(lines)
+
+    def log(self, game: Game, game_number: int) -> None:
+        if self.__closed:
+            raise ValueError("Game log is closed!")
+        if game_number % self.__every:
+            return
+
+        players = {
+            player.name: {
+                rnd: [
+                    [
+                        s.total,
+                        s.has_ace,
+                        a.value,
+                        gain,
+                        repr(card) if card else None,
+                    ]
+                    for s, a, gain, card in player.experiences[rnd]
+                ]
+                for rnd in player.experiences
+            }
+            for player in game.players
+        }
+        self.__lines.append(
+            json.dumps({"game": game_number, "players": players}, separators=(",", ":"))
+            + "\n"
+        )
+
+        if len(self.__lines) >= self.__buffer:
+            self.__queue.put(self.__lines)
+            self.__lines = []
+
+    def close(self) -> None:
+        if self.__closed:
+            return
+        self.__closed = True
+
+        if self.__lines:
+            self.__queue.put(self.__lines)
+            self.__lines = []
+        self.__queue.put(None)
+        self.__writer.join()
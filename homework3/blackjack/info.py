@@ -84,9 +84,9 @@ class Info:
         return logger
 
     @staticmethod
-    def log_game(game: Game, game_number: int, nof: str):
-        if not os.path.exists("logs"):
-            os.mkdir("logs")
+    def log_game(game: Game, game_number: int, nof: str, directory: str = "logs"):
+        if not os.path.exists(directory):
+            os.mkdir(directory)
 
         to_log = (
             f"[Game {game_number}]:\r\n\r\n"
@@ -94,7 +94,7 @@ class Info:
             + "\r\n"
         )
 
-        with open(f"./logs/game_log_{nof}.txt", "a") as gl:
+        with open(os.path.join(directory, f"game_log_{nof}.txt"), "a") as gl:
             gl.write(to_log)
 
     @staticmethod
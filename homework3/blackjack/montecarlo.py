@@ -1,17 +1,17 @@
-import os.path
-from abc import ABC, abstractmethod
+from abc import abstractmethod
 from typing import Optional
 from warnings import filterwarnings
 
 from alive_progress import alive_bar
 
 from blackjack.agents import Player
+from blackjack.batch import BatchLearner, Transitions
 from blackjack.game import Game
-from blackjack.info import Info
+from blackjack.gamelog import GameLog, NoGameLog
 from blackjack.utils import State, Action, Q
 
 
-class MonteCarlo(ABC):
+class MonteCarlo(BatchLearner):
     """
     An interface for all Monte Carlo algorithms.
     """
@@ -23,7 +23,9 @@ class MonteCarlo(ABC):
         self.alpha = alpha
 
     @abstractmethod
-    def run(self, game: Game, iterations: int = 1000) -> Q:
+    def run(
+        self, game: Game, iterations: int = 1000, game_log: GameLog | None = None
+    ) -> Q:
         pass
 
 
@@ -37,20 +39,25 @@ class IncrMonteCarlo(MonteCarlo):
     ) -> None:
         super().__init__(q if q is not None else Q(), gamma, alpha)
 
-    def run(self, game: Game, iterations: int = 1000) -> Q:
+    def run(
+        self, game: Game, iterations: int = 1000, game_log: GameLog | None = None
+    ) -> Q:
+        """
+        Plays and learns from `iterations` games. Games are not logged unless
+        a game_log is given, which is left open for its owner to close.
+        """
         filterwarnings("ignore", category=DeprecationWarning)
         print("Starting Incremental Monte Carlo...")
 
-        if os.path.exists("game_log_imc.txt"):
-            os.remove("game_log_imc.txt")
+        game_log = game_log if game_log is not None else NoGameLog()
 
         with alive_bar(total=iterations) as bar:
             for i in range(iterations):
                 # Play a game
                 game.play(self.q, self.gamma)
 
-                # Log game information in a text file
-                Info.log_game(game, i, "imc")
+                # Log game information, as the logging policy says
+                game_log.log(game, i)
 
                 for player in game.players:
                     for rnd in player.experiences:
@@ -70,3 +77,7 @@ class IncrMonteCarlo(MonteCarlo):
 
         print("Finished Incremental Monte Carlo!")
         return self.q
+
+    def update_batch(self, transitions: Transitions) -> None:
+        t = transitions
+        self.q.update(t.totals, t.aces, t.actions, t.gains, self.alpha)
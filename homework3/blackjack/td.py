@@ -1,17 +1,18 @@
-import os.path
-from abc import ABC, abstractmethod
+from abc import abstractmethod
 from warnings import filterwarnings
 
+import numpy as np
 from alive_progress import alive_bar
 from observer import Observer
 
+from blackjack.batch import BatchLearner, Transitions
 from blackjack.game import Game
-from blackjack.info import Info
+from blackjack.gamelog import GameLog, NoGameLog
 from blackjack.policy import EpsGreedyPolicy
 from blackjack.utils import State, Action, Q
 
 
-class TD(ABC):
+class TD(BatchLearner):
     @abstractmethod
     def __init__(self, q: Q, gamma: float, alpha: float) -> None:
         self.q = q
@@ -19,9 +20,23 @@ class TD(ABC):
         self.alpha = alpha
 
     @abstractmethod
-    def run(self, game: Game, iterations: int) -> Q:
+    def run(self, game: Game, iterations: int, game_log: GameLog | None = None) -> Q:
         pass
 
+    @abstractmethod
+    def next_values(self, transitions: Transitions) -> np.ndarray:
+        """
+        Estimates of the values of the next states, none of them final.
+        """
+        pass
+
+    def update_batch(self, transitions: Transitions) -> None:
+        t = transitions
+        v_plus = np.zeros(len(t))
+        v_plus[~t.done] = self.next_values(t[~t.done])
+        targets = t.rewards + self.gamma * v_plus
+        self.q.update(t.totals, t.aces, t.actions, targets, self.alpha)
+
 
 class QLearning(TD, Observer):
     """
@@ -48,20 +63,27 @@ class QLearning(TD, Observer):
             r + self.gamma * v_plus
         )
 
-    def run(self, game: Game, iterations: int) -> Q:
+    def next_values(self, transitions: Transitions) -> np.ndarray:
+        t = transitions
+        return self.q.gather(t.next_totals, t.next_aces).max(axis=1)
+
+    def run(self, game: Game, iterations: int, game_log: GameLog | None = None) -> Q:
+        """
+        Plays and learns from `iterations` games. Games are not logged unless
+        a game_log is given, which is left open for its owner to close.
+        """
         filterwarnings("ignore", category=DeprecationWarning)
         print("Starting Q-Learning...")
 
-        if os.path.exists("game_log_ql.txt"):
-            os.remove("game_log_ql.txt")
+        game_log = game_log if game_log is not None else NoGameLog()
 
         with alive_bar(iterations) as bar:
             for i in range(iterations):
                 # Play a game
                 game.play(self.q, self.gamma)
 
-                # Log game information in a text file
-                Info.log_game(game, i, "ql")
+                # Log game information, as the logging policy says
+                game_log.log(game, i)
 
                 for player in game.players:
                     for rnd in player.experiences:
@@ -101,20 +123,27 @@ class SARSA(TD, Observer):
             r + self.gamma * q_plus
         )
 
-    def run(self, game: Game, iterations: int) -> Q:
+    def next_values(self, transitions: Transitions) -> np.ndarray:
+        t = transitions
+        return self.q.gather(t.next_totals, t.next_aces, t.next_actions)
+
+    def run(self, game: Game, iterations: int, game_log: GameLog | None = None) -> Q:
+        """
+        Plays and learns from `iterations` games. Games are not logged unless
+        a game_log is given, which is left open for its owner to close.
+        """
         filterwarnings("ignore", category=DeprecationWarning)
         print("Starting SARSA...")
 
-        if os.path.exists("game_log_sarsa.txt"):
-            os.remove("game_log_sarsa.txt")
+        game_log = game_log if game_log is not None else NoGameLog()
 
         with alive_bar(iterations) as bar:
             for i in range(iterations):
                 # Play a game
                 game.play(self.q, self.gamma)
 
-                # Log game information in a text file
-                Info.log_game(game, i, "sarsa")
+                # Log game information, as the logging policy says
+                game_log.log(game, i)
 
                 for player in game.players:
                     for rnd in player.experiences:
@@ -1,7 +1,7 @@
-from dataclasses import dataclass, astuple
+from dataclasses import dataclass
 from enum import Enum, StrEnum
-from random import shuffle
 
+import numpy as np
 from tabulate import tabulate
 
 
@@ -66,7 +66,7 @@ class CardNumber(Enum):
         ]
 
 
-@dataclass
+@dataclass(frozen=True)
 class Card:
     number: CardNumber
     suit: CardSuit
@@ -85,49 +85,85 @@ class Card:
         return f"{repr(self.number)}{repr(self.suit)}"
 
 
+# Every card of a set, indexed by its card code.
+CARDS: list[Card] = [
+    Card(number=n, suit=s)
+    for n in CardNumber.get_all_numbers()
+    for s in CardSuit.get_all_suits()
+]
+
+
 class CardDeck:
-    def __init__(self, no_sets: int = 5) -> None:
+    """
+    A shoe of no_sets card sets, kept as an array of card codes (indices into
+    CARDS) that is permuted in place on reshuffle. Drawing advances a cursor.
+    The shoe is reshuffled once the cut card is reached, after `penetration`
+    of it has been dealt.
+    """
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self.__codes
+
+    @property
+    def cursor(self) -> int:
+        return self.__cursor
+
+    @property
+    def cut(self) -> int:
+        return self.__cut
+
+    def __init__(
+        self,
+        no_sets: int = 5,
+        penetration: float = 1.0,
+        seed: int | np.random.SeedSequence | None = None,
+    ) -> None:
+        if not 0.0 < penetration <= 1.0:
+            raise ValueError("Penetration must be in (0, 1]!")
+
         self.__no_sets: int = no_sets
-        self.__deck: list[Card] = list()
+        self.__rng: np.random.Generator = np.random.default_rng(seed)
+        self.__codes: np.ndarray = np.tile(np.arange(len(CARDS)), no_sets)
+        self.__cut: int = max(1, int(penetration * len(self.__codes)))
+        self.__order: list[int] = []
+        self.__cursor: int = 0
         self.__reshuffle()
 
     def __str__(self) -> str:
         s = ""
-        for card in self.__deck:
-            s += repr(card) + " "
+        for code in self.__order[self.__cursor :]:
+            s += repr(CARDS[code]) + " "
 
         return s
 
     def __reshuffle(self) -> None:
         """
-        Used for (RE)creating and SHUFFLING the deck.
+        Used for SHUFFLING the whole shoe back together.
         """
-        self.__deck = self.__no_sets * [
-            Card(number=n, suit=s)
-            for n in CardNumber.get_all_numbers()
-            for s in CardSuit.get_all_suits()
-        ]
-
-        shuffle(self.__deck)
+        self.__rng.shuffle(self.__codes)
+        self.__order = self.__codes.tolist()
+        self.__cursor = 0
 
     def draw(self) -> Card:
-        if not self.__deck:
+        if self.__cursor >= self.__cut:
             self.__reshuffle()
-        return self.__deck.pop(0)
 
+        code = self.__order[self.__cursor]
+        self.__cursor += 1
+        return CARDS[code]
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class State:
+    """
+    An immutable hand value. Agents replace their state instead of changing
+    it, so states can be logged and passed around without copying.
+    """
+
     total: int = 0
     has_ace: bool = False
 
-    def __hash__(self) -> int:
-        return hash(astuple(self))
-
-    def reset(self) -> None:
-        self.total = 0
-        self.has_ace = False
-
 
 class Action(Enum):
     HIT = 0
@@ -184,12 +220,24 @@ class Experience:
 class Q:
     """
     Class for representing Q estimates.
+
+    Estimates are stored in a (states, actions) float array. The row of a
+    state is looked up by its total and ace flag in `rows` (-1 for states
+    that can not be decided in), the column of an action is its value.
     """
 
     @property
     def states(self) -> list[State]:
         return self.__states
 
+    @property
+    def values(self) -> np.ndarray:
+        return self.__q
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self.__rows
+
     def __init__(self) -> None:
         self.__states: list[State] = list()
         for total in range(4, 22):
@@ -201,25 +249,88 @@ class Q:
 
         self.__actions: list[Action] = [Action.HOLD, Action.HIT]
 
-        self.__q: dict[tuple[State, Action], float] = {
-            (s, a): 0.0 for s in self.__states for a in self.__actions
-        }
+        self.__rows: np.ndarray = np.full((32, 2), -1, dtype=np.int64)
+        for i, s in enumerate(self.__states):
+            self.__rows[s.total, int(s.has_ace)] = i
+        self.__row_list: list[list[int]] = self.__rows.tolist()
+
+        self.__q: np.ndarray = np.zeros((len(self.__states), len(self.__actions)))
+
+    def __row(self, s: State) -> int:
+        row = self.__row_list[s.total][s.has_ace] if 0 <= s.total < 32 else -1
+        if row < 0:
+            raise KeyError(s)
+        return row
+
+    def __rows_of(self, totals: np.ndarray, aces: np.ndarray) -> np.ndarray:
+        """
+        __row for arrays of states.
+        """
+        inside = (totals >= 0) & (totals < len(self.__rows))
+        rows = np.where(
+            inside,
+            self.__rows[totals.clip(0, len(self.__rows) - 1), aces.astype(np.int64)],
+            -1,
+        )
+        if (rows < 0).any():
+            i = np.argmax(rows < 0)
+            raise KeyError(State(total=int(totals[i]), has_ace=bool(aces[i])))
+        return rows
 
     def __getitem__(self, key: tuple[State, Action]) -> float:
         """
         Returns the received reward when ending up in given state and taking the given action.
         """
-        return self.__q[key]
+        s, a = key
+        return self.__q[self.__row(s), a.value].item()
 
     def __setitem__(self, key: tuple[State, Action], gain: float) -> None:
-        self.__q[key] = gain
+        s, a = key
+        self.__q[self.__row(s), a.value] = gain
 
     def __str__(self) -> str:
         to_repr = []
-        for s, a in self.__q:
-            to_repr.append({"State": s, "Action": a, "Value": self.__q[(s, a)]})
+        for s in self.__states:
+            for a in self.__actions:
+                to_repr.append({"State": s, "Action": a, "Value": self[s, a]})
 
         return tabulate(to_repr, headers="keys", tablefmt="rst")
 
     def determine_v(self, s: State) -> float:
-        return max([self.__q[s, a] for a in self.__actions])
+        return self.__q[self.__row(s)].max().item()
+
+    def gather(
+        self, totals: np.ndarray, aces: np.ndarray, actions: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Estimates of many states at once, of all actions (shaped (n, actions))
+        or of the given ones (shaped (n,)).
+        """
+        rows = self.__rows_of(totals, aces)
+        if actions is None:
+            return self.__q[rows]
+        return self.__q[rows, actions]
+
+    def update(
+        self,
+        totals: np.ndarray,
+        aces: np.ndarray,
+        actions: np.ndarray,
+        targets: np.ndarray,
+        alpha: float,
+    ) -> None:
+        """
+        Moves the estimates of many (state, action) pairs towards their targets
+        at once. A pair with k targets moves towards their mean with the step
+        1 - (1 - alpha)^k, which is what k incremental updates towards equal
+        targets would add up to.
+        """
+        keys = self.__rows_of(totals, aces) * self.__q.shape[1] + actions
+        pairs, inverse, counts = np.unique(
+            keys, return_inverse=True, return_counts=True
+        )
+        means = np.bincount(inverse, weights=targets) / counts
+        steps = 1.0 - (1.0 - alpha) ** counts
+
+        q = self.__q.reshape(-1)
+        q[pairs] += steps * (means - q[pairs])
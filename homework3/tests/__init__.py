@@ -3,3 +3,5 @@ from .test_game import *
 from .test_imc import *
 from .test_ql import *
 from .test_sarsa import *
+from .test_batch import *
+from .test_gamelog import *
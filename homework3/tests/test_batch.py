@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from blackjack import *
+
+
+def test_batch_game():
+    game = BatchGame(tables=500, no_players=2, seed=0)
+    transitions = game.play(Q(), gamma=0.9)
+
+    # Every hand ends with exactly one final transition per round and player.
+    assert transitions.done.sum() == game.tables * game.no_players**2
+    assert np.all((transitions.totals >= 4) & (transitions.totals <= 21))
+    assert np.all(transitions.rewards[~transitions.done] == 0.0)
+    assert np.all(np.isin(transitions.rewards[transitions.done], [-1.0, 0.0, 1.0]))
+    assert np.all(np.abs(transitions.gains) <= 1.0)
+
+
+def test_batch_learners():
+    initial = Q()
+    for learner in [
+        IncrMonteCarlo(q=Q(), gamma=0.9),
+        QLearning(q=Q(), gamma=0.9),
+        SARSA(q=Q(), gamma=0.9),
+    ]:
+        q = learner.run_batch(BatchGame(tables=5000, seed=0), iterations=20000)
+
+        # Training moved Q away from where it started...
+        assert any(
+            q[s, a] != initial[s, a] for s in q.states for a in Action.get_all_actions()
+        )
+
+        # ...and towards the textbook decisions: hold on a hard 20 and hit on
+        # a hard 12.
+        hard_20, hard_12 = State(20, False), State(12, False)
+        assert q[hard_20, Action.HOLD] > q[hard_20, Action.HIT]
+        assert q[hard_12, Action.HIT] > q[hard_12, Action.HOLD]
+
+
+def test_dense_q():
+    q = Q()
+    for i, s in enumerate(q.states):
+        q[s, Action.HIT], q[s, Action.HOLD] = i, -i
+        assert q.determine_v(s) == max(i, -i)
+
+    totals = np.array([s.total for s in q.states])
+    aces = np.array([s.has_ace for s in q.states])
+    assert np.array_equal(
+        q.gather(totals, aces)[:, Action.HIT.value], np.arange(len(q.states))
+    )
+
+    # Two updates of the same pair towards the same target add up like
+    # two incremental ones.
+    s = q.states[0]
+    expected = q[s, Action.HOLD]
+    for _ in range(2):
+        expected += 0.1 * (1.0 - expected)
+    q.update(
+        np.array([s.total] * 2),
+        np.array([s.has_ace] * 2),
+        np.array([Action.HOLD.value] * 2),
+        np.ones(2),
+        alpha=0.1,
+    )
+    assert np.isclose(q[s, Action.HOLD], expected)
+
+    # States that can not be decided in have no row to fall back on.
+    for total, ace in [(0, False), (2, False), (4, True), (40, False)]:
+        totals, aces = np.array([21, total]), np.array([True, ace])
+        with pytest.raises(KeyError):
+            q.gather(totals, aces)
+        with pytest.raises(KeyError):
+            q.update(totals, aces, np.zeros(2, dtype=np.int64), np.ones(2), 0.1)
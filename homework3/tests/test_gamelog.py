@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from blackjack import *
+
+
+def new_game(no_players: int = 2) -> Game:
+    Player.no_players = 0
+    return Game([Player() for _ in range(no_players)], Dealer())
+
+
+def read_lines(path: Path) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_game_logs(tmp_path: Path):
+    game = new_game()
+    ql = QLearning(q=Q(), gamma=0.9)
+    game.attach(ql)
+    ql.run(
+        game, 100, game_log=TextGameLog("ql_sampled", every=10, directory=str(tmp_path))
+    )
+    with open(tmp_path / "game_log_ql_sampled.txt") as f:
+        assert f.read().count("[Game ") == 10
+
+    game = new_game()
+    imc = IncrMonteCarlo(q=Q(), gamma=0.9)
+    with BufferedGameLog(
+        "imc_buffered", every=2, buffer=8, directory=str(tmp_path)
+    ) as log:
+        imc.run(game, 100, game_log=log)
+        # The trainer leaves the log open, so it can follow another run.
+        imc.run(game, 10, game_log=log)
+
+    lines = read_lines(tmp_path / "game_log_imc_buffered.jsonl")
+    expected = list(range(0, 100, 2)) + list(range(0, 10, 2))
+    assert [line["game"] for line in lines] == expected
+    assert all(len(line["players"]) == 2 for line in lines)
+
+    with pytest.raises(ValueError):
+        log.log(game, 0)
+
+
+def test_game_log_on_error(tmp_path: Path):
+    game = new_game()
+    imc = IncrMonteCarlo(q=Q(), gamma=0.9)
+
+    # Leaving the with block through an exception still writes every line.
+    with pytest.raises(RuntimeError):
+        with BufferedGameLog("imc_failed", buffer=1000, directory=str(tmp_path)) as log:
+            imc.run(game, 10, game_log=log)
+            raise RuntimeError
+
+    assert [
+        line["game"] for line in read_lines(tmp_path / "game_log_imc_failed.jsonl")
+    ] == list(range(10))